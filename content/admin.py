@@ -1,60 +1,201 @@
+from datetime import timedelta
+
 import nested_admin
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelectMultiple
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Count, DateTimeField, Max, Prefetch, Value
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from django.utils.timesince import timesince
 from django import forms
-from .models import LEDContent, ContentSession, SessionText, SessionLine, Image, SessionAnimation
+from .models import (
+    IMAGE_NAME_RE, LEDContent, ContentSession, SessionText, SessionLine, Image, SessionAnimation,
+    SessionAnimationImage, Device, ShowVersion,
+)
+from .analytics import content_polls
+from .cloning import clone_show
+from .durations import format_duration, get_show_duration, get_show_durations
+from .history import diff_versions, record_version, restore_version
+from .validation import ERROR, validate_show
+
+
+def image_label(image):
+    return f"{image.name}" + (f" - {image.description}" if image.description else "")
+
+
+def get_image_library():
+    """
+    Return (image_count, choices) for the image picker.
+
+    Choices are cached per Image table version (row count and latest
+    update) and are None once the library is too large for checkboxes.
+    """
+    version = Image.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    count = version['count']
+    if count > settings.LED_IMAGE_AUTOCOMPLETE_THRESHOLD:
+        return count, None
+
+    updated = version['updated'].timestamp() if version['updated'] else 0
+    key = f"content:image-choices:{count}:{updated}"
+    choices = cache.get(key)
+    if choices is None:
+        choices = [(img.name, image_label(img)) for img in Image.objects.all()]
+        cache.set(key, choices, None)
+    return count, choices
+
+
+class ImageAutocompleteWidget(AutocompleteSelectMultiple):
+    """Select2 image picker backed by ImageAdmin's name based autocomplete view"""
+
+    def __init__(self, attrs=None):
+        super().__init__(SessionAnimation._meta.get_field('images'), admin.site, attrs=attrs)
+
+    def get_url(self):
+        return reverse('admin:content_image_autocomplete')
+
+    def optgroups(self, name, value, attr=None):
+        # Only the selected names are rendered, the rest is fetched on demand
+        options = [
+            self.create_option(name, image_name, image_name, True, index)
+            for index, image_name in enumerate(v for v in value if v)
+        ]
+        return [(None, options, 0)]
 
 
 @admin.register(Image)
 class ImageAdmin(admin.ModelAdmin):
-    list_display = ['name', 'description', 'created_at']
+    list_display = ['name', 'description', 'size', 'created_at']
     search_fields = ['name', 'description']
     ordering = ['name']
-    fields = ['name', 'description']
+    fields = ['name', 'description', 'asset', 'sha256', 'size']
+    readonly_fields = ['sha256', 'size']
+    autocomplete_page_size = 20
+
+    def get_urls(self):
+        urls = [
+            path(
+                'autocomplete/',
+                self.admin_site.admin_view(self.autocomplete_view),
+                name='content_image_autocomplete'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def autocomplete_view(self, request):
+        """Paginated, searchable image list in the select2 JSON format"""
+        if not self.has_view_or_change_permission(request):
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+
+        queryset, _ = self.get_search_results(request, Image.objects.all(), request.GET.get('term', ''))
+        page = Paginator(queryset.order_by('name'), self.autocomplete_page_size).get_page(request.GET.get('page'))
+        return JsonResponse({
+            'results': [{'id': img.name, 'text': image_label(img)} for img in page],
+            'pagination': {'more': page.has_next()},
+        })
+
+
+class ImageNameChoiceField(forms.MultipleChoiceField):
+    """Accepts any well-formed image name; existence is checked in bulk by the form"""
+
+    def valid_value(self, value):
+        return bool(IMAGE_NAME_RE.match(str(value)))
 
 
 class SessionAnimationForm(forms.ModelForm):
     """Custom form for SessionAnimation with image selection"""
 
+    # (image_count, choices) shared by all forms of a request, see SessionAnimationInline
+    image_library = None
+
     # Create a custom field for selecting images
-    selected_images = forms.MultipleChoiceField(
+    selected_images = ImageNameChoiceField(
         required=False,
         widget=forms.CheckboxSelectMultiple,
         help_text="Select images to include in animation"
     )
+    image_names = forms.CharField(
+        required=False,
+        label="Image Names",
+        widget=forms.TextInput(attrs={'size': 60}),
+        help_text='Auto-generated from selected images. You can also manually edit the order here.'
+    )
 
     class Meta:
         model = SessionAnimation
-        fields = ['loop_count', 'time_between_images', 'selected_images', 'image_names']
-        widgets = {
-            'image_names': forms.TextInput(attrs={'size': 60})
-        }
+        fields = ['loop_count', 'time_between_images']
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Populate choices from Image table
-        self.fields['selected_images'].choices = [
-            (img.name, f"{img.name}" + (f" - {img.description}" if img.description else ""))
-            for img in Image.objects.all()
-        ]
-
-        # Pre-populate selected_images if editing existing animation
-        if self.instance and self.instance.pk and self.instance.image_names:
-            self.fields['selected_images'].initial = self.instance.get_image_list()
+        # Populate choices from the cached Image table, large libraries get an autocomplete
+        _, choices = self.image_library or get_image_library()
+        if choices is None:
+            self.fields['selected_images'].widget = ImageAutocompleteWidget()
+        else:
+            self.fields['selected_images'].choices = choices
 
-        # Make image_names readonly (will be auto-populated from checkboxes)
-        # self.fields['image_names'].widget.attrs['readonly'] = True
-        self.fields['image_names'].help_text = 'Auto-generated from selected images. You can also manually edit the order here.'
+        # Pre-populate selected images and their order if editing existing animation
+        if self.instance and self.instance.pk:
+            image_list = self.instance.get_image_list()
+            self.fields['selected_images'].initial = image_list
+            self.fields['image_names'].initial = ','.join(image_list)
 
     def clean(self):
         cleaned_data = super().clean()
         selected_images = cleaned_data.get('selected_images', [])
+        image_names = cleaned_data.get('image_names', '')
 
-        # Convert selected images to comma-separated string
+        # The text field carries the order; checkboxes only add/remove images
+        names = [name.strip() for name in image_names.split(',') if name.strip()]
         if selected_images:
-            cleaned_data['image_names'] = ','.join(selected_images)
+            names = [name for name in names if name in selected_images]
+            names += [name for name in selected_images if name not in names]
+
+        if not names:
+            self.add_error('image_names', 'At least one image name is required')
+            return cleaned_data
+
+        for name in names:
+            if not IMAGE_NAME_RE.match(name):
+                self.add_error('image_names', f'Invalid image name "{name}". Only letters, numbers, underscore and hyphen allowed')
+                return cleaned_data
 
+        choices = self.fields['selected_images'].choices
+        if choices:
+            known = {value for value, _ in choices}
+        else:
+            known = set(Image.objects.filter(name__in=names).values_list('name', flat=True))
+        missing = set(names) - known
+        if missing:
+            self.add_error('image_names', f'Images not found in database: {", ".join(sorted(missing))}')
+
+        cleaned_data['image_names'] = ','.join(names)
         return cleaned_data
 
+    def save(self, commit=True):
+        instance = super().save(commit=commit)
+        names = self.cleaned_data['image_names'].split(',')
+        if commit:
+            instance.set_images(names)
+        else:
+            save_m2m = self.save_m2m
+
+            def save_images():
+                save_m2m()
+                instance.set_images(names)
+
+            self.save_m2m = save_images
+        return instance
+
 
 class SessionLineInline(nested_admin.NestedTabularInline):
     model = SessionLine
@@ -62,6 +203,9 @@ class SessionLineInline(nested_admin.NestedTabularInline):
     max_num = 13
     fields = ['start_index', 'color']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('content_session__led_content')
+
 
 class SessionTextInline(nested_admin.NestedStackedInline):
     model = SessionText
@@ -70,6 +214,9 @@ class SessionTextInline(nested_admin.NestedStackedInline):
     min_num = 0
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('content_session__led_content')
+
 
 class SessionAnimationInline(nested_admin.NestedStackedInline):
     model = SessionAnimation
@@ -79,6 +226,18 @@ class SessionAnimationInline(nested_admin.NestedStackedInline):
     min_num = 0
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('content_session__led_content').prefetch_related(
+            Prefetch('animation_images', queryset=SessionAnimationImage.objects.select_related('image'))
+        )
+
+    def get_formset(self, request, obj=None, **kwargs):
+        # Compute the image choices once per request instead of once per form
+        if not hasattr(request, '_image_library'):
+            request._image_library = get_image_library()
+        kwargs['form'] = type(self.form.__name__, (self.form,), {'image_library': request._image_library})
+        return super().get_formset(request, obj, **kwargs)
+
 
 class ContentSessionInline(nested_admin.NestedStackedInline):
     model = ContentSession
@@ -86,19 +245,254 @@ class ContentSessionInline(nested_admin.NestedStackedInline):
     fields = ['session_order', 'start_date', 'start_time', 'end_date', 'end_time', 'delay']
     inlines = [SessionTextInline, SessionAnimationInline, SessionLineInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('led_content')
+
+
+class LEDContentChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Compute the durations of the whole page in one batch
+        durations = get_show_durations(self.result_list)
+        for led_content in self.result_list:
+            led_content.show_duration = durations[led_content.pk]
+
 
 @admin.register(LEDContent)
 class LEDContentAdmin(nested_admin.NestedModelAdmin):
-    list_display = ['title', 'created_by', 'created_at', 'is_active', 'is_test']
+    list_display = ['title', 'created_by', 'created_at', 'is_active', 'is_test', 'cycle_time']
     list_filter = ['is_active', 'is_test', 'created_at', 'created_by']
     search_fields = ['title']
-    readonly_fields = ['created_at', 'checksum']
-    fields = ['title', 'start_time', 'end_time', 'is_active', 'is_test']
+    readonly_fields = ['created_at', 'checksum', 'preview', 'durations']
+    fields = ['title', 'start_time', 'end_time', 'is_active', 'is_test', 'preview', 'durations']
     inlines = [ContentSessionInline]
+    actions = ['validate_shows', 'clone_shows', 'clone_shows_next_week']
+
+    def get_urls(self):
+        urls = [
+            path(
+                '<path:object_id>/preview/',
+                self.admin_site.admin_view(self.preview_view),
+                name='content_ledcontent_preview'
+            ),
+            path(
+                'poll-analytics/',
+                self.admin_site.admin_view(self.poll_analytics_view),
+                name='content_ledcontent_poll_analytics'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def get_changelist(self, request, **kwargs):
+        return LEDContentChangeList
+
+    @admin.display(description="Cycle time")
+    def cycle_time(self, obj):
+        duration = getattr(obj, 'show_duration', None) or get_show_duration(obj)
+        return format_duration(duration.cycle_at())
+
+    @admin.display(description="Durations")
+    def durations(self, obj):
+        if not obj.pk:
+            return "Available after saving"
+        duration = get_show_duration(obj)
+        cycle = duration.cycle_at()
+        cycles_per_day = duration.cycles_per_day()
+        return render_to_string('admin/content/ledcontent/durations.html', {
+            'sessions': [
+                {**session, **{key: format_duration(session[key]) for key in ['text', 'animation', 'duration']}}
+                for session in duration.sessions()
+            ],
+            'cycle': format_duration(cycle),
+            'full_cycle': format_duration(duration.cycle) if duration.cycle != cycle else None,
+            'daily': format_duration(duration.daily_seconds * 1000),
+            'cycles_per_day': round(cycles_per_day, 1) if cycles_per_day else None,
+        })
+
+    @admin.display(description="Preview")
+    def preview(self, obj):
+        if not obj.pk:
+            return "Available after saving"
+        return format_html('<a href="{}">Simulate on the LED matrix</a>', reverse('admin:content_ledcontent_preview', args=[obj.pk]))
+
+    def preview_view(self, request, object_id):
+        led_content = get_object_or_404(LEDContent, pk=object_id)
+        if not self.has_view_or_change_permission(request, led_content):
+            raise PermissionDenied
+        return TemplateResponse(request, 'admin/content/ledcontent/preview.html', {
+            **self.admin_site.each_context(request),
+            'title': f'Preview: {led_content}',
+            'opts': self.opts,
+            'original': led_content,
+            'frames_url': reverse('led-content-frames', args=[led_content.pk]),
+        })
+
+    def poll_analytics_view(self, request):
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        return TemplateResponse(request, 'admin/content/ledcontent/poll_analytics.html', {
+            **self.admin_site.each_context(request),
+            'title': 'Poll analytics',
+            'opts': self.opts,
+            'stats': content_polls.snapshot(),
+            'json_url': reverse('poll-analytics'),
+        })
 
     def save_model(self, request, obj, form, change):
         if not change:
             obj.created_by = request.user
+        else:
+            # Keep the stored state restorable when it was never recorded, e.g. on the first edit of an older show
+            record_version(LEDContent.objects.get(pk=obj.pk), note="Before editing")
         super().save_model(request, obj, form, change)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        self.message_issues(request, form.instance)
+        record_version(form.instance, created_by=request.user)
+
+    def message_issues(self, request, led_content):
+        issues = validate_show(led_content)
+        for issue in issues:
+            level = messages.ERROR if issue.level == ERROR else messages.WARNING
+            self.message_user(request, f'{led_content}: {issue}', level)
+        return issues
+
+    @admin.action(description="Validate selected shows")
+    def validate_shows(self, request, queryset):
+        for led_content in queryset:
+            if not self.message_issues(request, led_content):
+                self.message_user(request, f'{led_content}: no issues found', messages.SUCCESS)
+
+    def _clone(self, request, queryset, date_offset=None):
+        for led_content in queryset:
+            try:
+                clone = clone_show(led_content, created_by=request.user, date_offset=date_offset)
+            except ValidationError as e:
+                self.message_user(request, f'Could not clone "{led_content}": {"; ".join(e.messages)}', messages.ERROR)
+                continue
+            self.message_user(request, f'Cloned "{led_content}" as "{clone}"', messages.SUCCESS)
+
+    @admin.action(description="Clone selected shows")
+    def clone_shows(self, request, queryset):
+        self._clone(request, queryset)
+
+    @admin.action(description="Clone selected shows with session dates moved one week ahead")
+    def clone_shows_next_week(self, request, queryset):
+        self._clone(request, queryset, timedelta(weeks=1))
+
+
+def active_content_identifiers(active):
+    """What a device running the active show may report: its version (see /api/version) or its checksum"""
+    return [identifier for identifier in (active.version, active.checksum) if identifier]
+
+
+class DeviceStatusFilter(admin.SimpleListFilter):
+    title = "status"
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return [('online', "Online"), ('offline', "Offline"), ('stale', "Running outdated content")]
+
+    def queryset(self, request, queryset):
+        cutoff = timezone.now() - timedelta(seconds=settings.LED_TELEMETRY_OFFLINE_AFTER)
+        if self.value() == 'online':
+            return queryset.filter(last_seen__gte=cutoff)
+        if self.value() == 'offline':
+            return queryset.filter(last_seen__lt=cutoff)
+        if self.value() == 'stale':
+            active = LEDContent.objects.filter(is_active=True).order_by('-created_at').first()
+            if active is None:
+                return queryset.none()
+            return queryset.exclude(checksum='').exclude(checksum__in=active_content_identifiers(active))
+        return queryset
+
+
+@admin.register(Device)
+class DeviceAdmin(admin.ModelAdmin):
+    list_display = ['device_id', 'is_online', 'last_seen', 'content_status', 'checksum', 'uptime', 'error_count', 'ip_address']
+    list_filter = [DeviceStatusFilter]
+    search_fields = ['device_id', 'ip_address']
+    readonly_fields = ['device_id', 'checksum', 'uptime', 'error_count', 'ip_address', 'first_seen', 'last_seen']
+
+    def get_queryset(self, request):
+        # Compare every device against the active show, which is looked up once per list
+        active = LEDContent.objects.filter(is_active=True).order_by('-created_at').first()
+        return super().get_queryset(request).annotate(
+            active_version=Value(active.version if active else ''),
+            active_checksum=Value(active.checksum if active else ''),
+            active_updated_at=Value(active.updated_at if active else None, output_field=DateTimeField()),
+        )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(boolean=True, description="Online", ordering='last_seen')
+    def is_online(self, obj):
+        return (timezone.now() - obj.last_seen).total_seconds() < settings.LED_TELEMETRY_OFFLINE_AFTER
+
+    @admin.display(description="Content")
+    def content_status(self, obj):
+        if obj.active_updated_at is None:
+            return "Unknown (no active show)"
+        if not obj.checksum:
+            return "Unknown (the device reported no version)"
+        if obj.checksum in (obj.active_version, obj.active_checksum):
+            return "Current"
+        return f"Stale for {timesince(obj.active_updated_at)}"
+
+
+@admin.register(ShowVersion)
+class ShowVersionAdmin(admin.ModelAdmin):
+    list_display = ['led_content', 'number', 'created_at', 'created_by', 'session_count', 'note']
+    list_filter = ['led_content']
+    list_select_related = ['led_content', 'created_by']
+    fields = ['led_content', 'number', 'created_at', 'created_by', 'note', 'hash', 'changes']
+    readonly_fields = fields
+    actions = ['restore_versions', 'compare_versions']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Sessions")
+    def session_count(self, obj):
+        return len(obj.sessions)
+
+    @admin.display(description="Changes since previous version")
+    def changes(self, obj):
+        previous = obj.led_content.versions.filter(number__lt=obj.number).order_by('-number').first()
+        if previous is None:
+            return "First recorded version"
+        return render_to_string('admin/content/showversion/changes.html', {'changes': diff_versions(previous, obj)})
+
+    @admin.action(description="Restore selected version")
+    def restore_versions(self, request, queryset):
+        if not request.user.has_perm('content.change_ledcontent'):
+            raise PermissionDenied
+        if queryset.count() != 1:
+            self.message_user(request, "Select exactly one version to restore", messages.ERROR)
+            return
+        version = queryset.select_related('led_content').get()
+        try:
+            restored = restore_version(version, created_by=request.user)
+        except ValidationError as e:
+            self.message_user(request, f'Could not restore "{version}": {"; ".join(e.messages)}', messages.ERROR)
+            return
+        self.message_user(request, f'Restored "{version}" as version {restored.number}', messages.SUCCESS)
 
+    @admin.action(description="Compare two selected versions")
+    def compare_versions(self, request, queryset):
+        versions = list(queryset.select_related('led_content').order_by('led_content', 'number'))
+        if len(versions) != 2 or versions[0].led_content_id != versions[1].led_content_id:
+            self.message_user(request, "Select two versions of the same show to compare", messages.ERROR)
+            return
+        old, new = versions
+        return TemplateResponse(request, 'admin/content/showversion/compare.html', {
+            **self.admin_site.each_context(request),
+            'title': f'{old.led_content}: version {old.number} → {new.number}',
+            'opts': self.opts,
+            'changes': diff_versions(old, new),
+        })
@@ -0,0 +1,185 @@
+"""
+In-process poll analytics with bounded memory.
+
+Every structure here has a fixed size, so memory use does not grow with
+the number of devices polling:
+
+* RollingCounter - per-minute counters over the last hour
+* HyperLogLog - approximate unique clients per hour (last 24 hours)
+* SpaceSaving - top-K heaviest pollers of the current and previous hour
+* a fixed table of last-served version fingerprints (indexed by client
+  hash) to detect wasted polls, i.e. polls that returned content the
+  client already had. Collisions only make this an estimate.
+"""
+import hashlib
+import math
+import threading
+import time
+from array import array
+
+
+def hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+class RollingCounter:
+    """Counts per time bucket over a fixed window"""
+
+    def __init__(self, bucket_seconds=60, bucket_count=60):
+        self.bucket_seconds = bucket_seconds
+        self.counts = array('Q', bytes(8 * bucket_count))
+        self.epochs = array('q', [-1] * bucket_count)
+
+    def _bucket(self, now):
+        epoch = int(now // self.bucket_seconds)
+        index = epoch % len(self.counts)
+        if self.epochs[index] != epoch:
+            self.epochs[index] = epoch
+            self.counts[index] = 0
+        return index
+
+    def add(self, now, amount=1):
+        self.counts[self._bucket(now)] += amount
+
+    def series(self, now):
+        """Counts of the window, oldest bucket first"""
+        epoch = int(now // self.bucket_seconds)
+        size = len(self.counts)
+        return [
+            self.counts[e % size] if self.epochs[e % size] == e else 0
+            for e in range(epoch - size + 1, epoch + 1)
+        ]
+
+
+class HyperLogLog:
+    def __init__(self, precision=10):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, hashed):
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def clear(self):
+        self.registers[:] = bytes(len(self.registers))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class SpaceSaving:
+    """Top-K heavy hitters with at most ``k`` tracked keys"""
+
+    def __init__(self, k=20):
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, key):
+        if key in self.counts:
+            self.counts[key] += 1
+        elif len(self.counts) < self.k:
+            self.counts[key] = 1
+            self.errors[key] = 0
+        else:
+            smallest = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(smallest)
+            del self.errors[smallest]
+            self.counts[key] = floor + 1
+            self.errors[key] = floor
+
+    def clear(self):
+        self.counts.clear()
+        self.errors.clear()
+
+    def top(self):
+        return [
+            {'client': key, 'polls': count, 'max_overcount': self.errors[key]}
+            for key, count in sorted(self.counts.items(), key=lambda item: -item[1])
+        ]
+
+
+class PollAnalytics:
+    def __init__(self, hours=24, top_k=20, version_slots=4096):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.polls = RollingCounter()
+        self.wasted = RollingCounter()
+        self.unique = [HyperLogLog() for _ in range(hours)]
+        self.unique_hours = array('q', [-1] * hours)
+        self.heavy = SpaceSaving(top_k)
+        self.previous_heavy = []
+        self.heavy_hour = -1
+        self.last_versions = array('Q', bytes(8 * version_slots))
+
+    def record(self, client, version, now=None):
+        now = now or time.time()
+        client_hash = hash64(client)
+        version_hash = hash64(version) or 1
+        hour = int(now // 3600)
+
+        with self._lock:
+            self.polls.add(now)
+
+            slot = client_hash % len(self.last_versions)
+            if self.last_versions[slot] == version_hash:
+                self.wasted.add(now)
+            self.last_versions[slot] = version_hash
+
+            index = hour % len(self.unique)
+            if self.unique_hours[index] != hour:
+                self.unique_hours[index] = hour
+                self.unique[index].clear()
+            self.unique[index].add(client_hash)
+
+            if self.heavy_hour != hour:
+                self.previous_heavy = self.heavy.top() if self.heavy_hour == hour - 1 else []
+                self.heavy_hour = hour
+                self.heavy.clear()
+            self.heavy.add(client)
+
+    def snapshot(self, now=None):
+        now = now or time.time()
+        hour = int(now // 3600)
+        with self._lock:
+            polls = self.polls.series(now)
+            wasted = self.wasted.series(now)
+            unique = [
+                {
+                    'hour': time.strftime('%Y-%m-%dT%H:00Z', time.gmtime(h * 3600)),
+                    'devices': self.unique[h % len(self.unique)].count()
+                    if self.unique_hours[h % len(self.unique)] == h else 0,
+                }
+                for h in range(hour - len(self.unique) + 1, hour + 1)
+            ]
+            current_heavy = self.heavy.top() if self.heavy_hour == hour else []
+            previous_heavy = self.previous_heavy if self.heavy_hour == hour else (
+                self.heavy.top() if self.heavy_hour == hour - 1 else []
+            )
+
+        polls_last_hour = sum(polls)
+        devices_this_hour = unique[-1]['devices']
+        return {
+            'since': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.started)),
+            'polls_per_minute': polls,
+            'polls_last_hour': polls_last_hour,
+            'wasted_polls_last_hour': sum(wasted),
+            'wasted_ratio': round(sum(wasted) / polls_last_hour, 3) if polls_last_hour else 0,
+            'unique_devices_per_hour': unique,
+            'polls_per_device_per_minute': round(polls_last_hour / 60 / devices_this_hour, 2) if devices_this_hour else 0,
+            'top_pollers': current_heavy,
+            'top_pollers_previous_hour': previous_heavy,
+        }
+
+
+content_polls = PollAnalytics()
@@ -0,0 +1,72 @@
+"""
+Async counterparts of the device endpoints.
+
+They use the async ORM and async cache access and return the same bytes as
+the DRF views in content.views, without tying up a thread per request under
+ASGI. ledmatrix/asgi.py routes the device URLs here (see content.urls).
+"""
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+
+from .analytics import content_polls
+from .models import LEDContent
+from .probe import aget_probe
+from .render_store import ashow_def, ashow_json
+from .schedule import warmer
+from .views import client_ip
+
+
+class AsyncLEDContentAPIView(View):
+    http_method_names = ['get', 'head', 'options']
+
+    async def get_object(self):
+        # Return the most recent active LED content
+        return await LEDContent.objects.filter(is_active=True).order_by('-created_at').afirst()
+
+    async def get(self, request, *args, **kwargs):
+        warmer.ensure_started()
+        instance = await self.get_object()
+        if instance is None:
+            return HttpResponse(JSONRenderer().render({'sessions': [], 'checksum': ''}), content_type='application/json')
+        return HttpResponse(await ashow_json(instance), content_type='application/json')
+
+
+class AsyncLEDContentDefView(View):
+    http_method_names = ['get', 'head', 'options']
+    poll_analytics = content_polls
+
+    async def get_object(self):
+        # Return the most recent active LED content
+        return await LEDContent.objects.filter(is_active=True).order_by('-created_at').afirst()
+
+    async def get(self, request, *args, **kwargs):
+        warmer.ensure_started()
+        instance = await self.get_object()
+        if self.poll_analytics is not None:
+            self.poll_analytics.record(client_ip(request), instance.version if instance else '')
+        if instance is None:
+            return HttpResponse('', content_type='text/plain; charset=utf-8')
+        return StreamingHttpResponse(await ashow_def(instance), content_type='text/plain; charset=utf-8')
+
+
+class AsyncLEDContentDefTestView(AsyncLEDContentDefView):
+    """Async view for serving test LED content in .def format"""
+    poll_analytics = None
+
+    async def get_object(self):
+        # Return the test LED content
+        return await LEDContent.objects.filter(is_test=True).afirst()
+
+
+class AsyncVersionProbeView(View):
+    http_method_names = ['get', 'head', 'options']
+    kind = 'active'
+
+    async def get(self, request, *args, **kwargs):
+        warmer.ensure_started()
+        return HttpResponse(await aget_probe(self.kind), content_type='application/json')
+
+
+class AsyncVersionProbeTestView(AsyncVersionProbeView):
+    kind = 'test'
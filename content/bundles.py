@@ -0,0 +1,109 @@
+"""
+Content-addressed image bundles for the displays.
+
+A bundle packs the assets of all images a show references, sorted by name,
+into one file named after the SHA-256 of its index, so identical image sets
+share a bundle and a bundle never changes once written::
+
+    b'LEDB', u8 format version, u32 image count, u32 index length
+    index: image count x (u16 length + name, 32 byte SHA-256, u64 offset, u64 length)
+    image data at the indexed offsets
+
+Devices read the header and index with a Range request, compare the image
+hashes with what they have, and then fetch only the changed images by
+their offset and length, resuming interrupted downloads the same way.
+"""
+import hashlib
+import os
+import struct
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Image
+
+
+MAGIC = b'LEDB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBII')
+ENTRY = struct.Struct('<32sQQ')
+
+
+def show_images(led_content):
+    """Images referenced by the animations of a show, sorted by name"""
+    return Image.objects.filter(
+        animation_entries__animation__content_session__led_content=led_content
+    ).distinct().order_by('name')
+
+
+def bundle_index(images):
+    """Return (bundle hash, header and index bytes, index entries) for images with assets"""
+    names = [image.name.encode() for image in images]
+    index_length = sum(2 + len(name) + ENTRY.size for name in names)
+    offset = HEADER.size + index_length
+
+    entries = []
+    index = bytearray()
+    for image, name in zip(images, names):
+        entries.append({'name': image.name, 'sha256': image.sha256, 'offset': offset, 'length': image.size})
+        index += struct.pack('<H', len(name)) + name + ENTRY.pack(bytes.fromhex(image.sha256), offset, image.size)
+        offset += image.size
+
+    head = HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), index_length) + bytes(index)
+    return hashlib.sha256(head).hexdigest(), head, entries
+
+
+def bundle_path(bundle_hash):
+    return os.path.join(settings.LED_IMAGE_BUNDLE_DIR, f'{bundle_hash}.ledb')
+
+
+def build_bundle(images):
+    """
+    Write the bundle of ``images`` unless it exists, returns (bundle hash, size, entries).
+
+    The file is written next to its final name and moved into place, so a
+    bundle is either complete or absent.
+    """
+    bundle_hash, head, entries = bundle_index(images)
+    path = bundle_path(bundle_hash)
+    if not os.path.exists(path):
+        os.makedirs(settings.LED_IMAGE_BUNDLE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{bundle_hash}.', dir=settings.LED_IMAGE_BUNDLE_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(head)
+                for image in images:
+                    with image.asset.open('rb') as asset:
+                        for chunk in asset.chunks():
+                            f.write(chunk)
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+    return bundle_hash, len(head) + sum(entry['length'] for entry in entries), entries
+
+
+def get_bundle_manifest(led_content):
+    """
+    Manifest of the image bundle of a show, building the bundle if needed.
+
+    Cached per content version; image uploads bump the version of every
+    show using the image.
+    """
+    key = f"content:bundle:{led_content.version}"
+    manifest = cache.get(key)
+    if manifest is None:
+        images = list(show_images(led_content))
+        with_assets = [image for image in images if image.asset]
+        bundle_hash, size, entries = build_bundle(with_assets)
+        manifest = {
+            'bundle': bundle_hash,
+            'size': size,
+            'images': entries,
+            'missing': [image.name for image in images if not image.asset],
+        }
+        cache.set(key, manifest, None)
+    return manifest
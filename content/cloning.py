@@ -0,0 +1,135 @@
+from datetime import date, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .fields import packed_to_hex, to_packed
+from .models import (
+    LEDContent, ContentSession, SessionText, SessionLine, Image, SessionAnimation, SessionAnimationImage
+)
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def session_spec(session):
+    """Return a plain (JSON serializable) description of a loaded session tree"""
+    text = getattr(session, 'text', None)
+    animation = getattr(session, 'animation', None)
+    return {
+        'session_order': session.session_order,
+        'delay': session.delay,
+        'start_date': _isoformat(session.start_date),
+        'start_time': _isoformat(session.start_time),
+        'end_date': _isoformat(session.end_date),
+        'end_time': _isoformat(session.end_time),
+        'text': {
+            'start_index': text.start_index,
+            'content': text.content,
+            'color': packed_to_hex(text.color),
+        } if text is not None else None,
+        'lines': [
+            {'start_index': line.start_index, 'color': packed_to_hex(line.color)}
+            for line in sorted(session.lines.all(), key=lambda line: line.start_index)
+        ],
+        'animation': {
+            'loop_count': animation.loop_count,
+            'time_between_images': animation.time_between_images,
+            'images': animation.get_image_list(),
+        } if animation is not None else None,
+    }
+
+
+def session_specs(led_content):
+    """Return the session specs of a show, loaded in a fixed number of queries"""
+    return [session_spec(session) for session in led_content.sessions.with_related().order_by('session_order')]
+
+
+def _shift(value, date_offset):
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value) + date_offset
+    except OverflowError:
+        raise ValidationError(f'Moving {value} by {date_offset.days} days leaves the supported date range')
+
+
+def _parse_time(value):
+    return time.fromisoformat(value) if value is not None else None
+
+
+def create_sessions(led_content, specs, date_offset=None):
+    """
+    Create the session trees described by ``specs`` under ``led_content``.
+
+    Uses one bulk_create per model, so the number of queries does not
+    depend on the size of the show. Callers should wrap this in a
+    transaction.
+    """
+    date_offset = date_offset or timedelta()
+    sessions = ContentSession.objects.bulk_create([
+        ContentSession(
+            led_content=led_content,
+            session_order=spec['session_order'],
+            delay=spec['delay'],
+            start_date=_shift(spec['start_date'], date_offset),
+            start_time=_parse_time(spec['start_time']),
+            end_date=_shift(spec['end_date'], date_offset),
+            end_time=_parse_time(spec['end_time']),
+        )
+        for spec in specs
+    ])
+
+    texts = []
+    lines = []
+    animations = []
+    image_lists = []
+    for session, spec in zip(sessions, specs):
+        if spec['text'] is not None:
+            texts.append(SessionText(content_session=session, **{**spec['text'], 'color': to_packed(spec['text']['color'])}))
+        lines.extend(
+            SessionLine(content_session=session, **{**line, 'color': to_packed(line['color'])})
+            for line in spec['lines']
+        )
+        if spec['animation'] is not None:
+            animation = dict(spec['animation'])
+            image_lists.append(animation.pop('images'))
+            animations.append(SessionAnimation(content_session=session, **animation))
+
+    SessionText.objects.bulk_create(texts)
+    SessionLine.objects.bulk_create(lines)
+    SessionAnimation.objects.bulk_create(animations)
+
+    names = {name for image_list in image_lists for name in image_list}
+    images = Image.objects.in_bulk(names, field_name='name') if names else {}
+    missing = names - set(images)
+    if missing:
+        raise ValidationError(f'Images not found in database: {", ".join(sorted(missing))}')
+    SessionAnimationImage.objects.bulk_create([
+        SessionAnimationImage(animation=animation, image=images[name], position=position)
+        for animation, image_list in zip(animations, image_lists)
+        for position, name in enumerate(image_list)
+    ])
+    return sessions
+
+
+def clone_show(led_content, created_by, title=None, date_offset=None):
+    """
+    Deep-copy a show including all sessions in a single transaction.
+
+    The copy is neither active nor test content, and all session dates can
+    be shifted by ``date_offset`` (a timedelta).
+    """
+    with transaction.atomic():
+        specs = session_specs(led_content)
+        clone = LEDContent.objects.create(
+            title=title or f"{led_content.title} (copy)"[:200],
+            created_by=created_by,
+            start_time=led_content.start_time,
+            end_time=led_content.end_time,
+            is_active=False,
+            is_test=False,
+        )
+        create_sessions(clone, specs, date_offset)
+    return clone
@@ -0,0 +1,248 @@
+"""
+Show duration and cycle-time calculator.
+
+Computes how long each session is shown and how long one cycle of a show
+takes, using the same timing rules as the simulator: text scrolls one
+pixel per ``delay`` once it no longer fits the matrix (sessions without
+text repeat the previous text), animations take ``image count x
+loop_count x time_between_images`` and a session lasts as long as the
+longer of both.
+
+All sessions of all requested shows are loaded with a single values query
+and computed as numpy arrays; results are cached per content version.
+Which sessions take part in a cycle depends on their windows (dated ones,
+or daily ones for sessions with times but no date, see content.schedule),
+and the Frame1/Frame0 daily window decides how many cycles run per day, so
+both are evaluated when a result is read.
+"""
+from datetime import time
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+
+from .font import text_width
+from .models import ContentSession
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+FIELDS = [
+    'led_content_id', 'session_order', 'delay',
+    'start_date', 'start_time', 'end_date', 'end_time',
+    'text__start_index', 'text__content',
+    'animation__loop_count', 'animation__time_between_images', 'image_count',
+]
+
+
+class ShowDuration(NamedTuple):
+    session_orders: np.ndarray  # (N,) session order
+    text_durations: np.ndarray  # (N,) milliseconds the text needs to scroll through
+    animation_durations: np.ndarray  # (N,) milliseconds of all animation loops
+    durations: np.ndarray  # (N,) milliseconds each session is shown
+    window_starts: np.ndarray  # (N,) datetime64[s], NaT for open or undated windows
+    window_ends: np.ndarray  # (N,) datetime64[s], NaT for open or undated windows
+    dated: np.ndarray  # (N,) bool, session has a date window
+    daily_starts: np.ndarray  # (N,) seconds of the day the daily window opens
+    daily_ends: np.ndarray  # (N,) seconds of the day the daily window closes (exclusive)
+    timed: np.ndarray  # (N,) bool, undated session with a daily window
+    frame1: time = None
+    frame0: time = None
+
+    @property
+    def cycle(self):
+        """Milliseconds of one cycle through every session, ignoring date windows"""
+        return int(self.durations.sum())
+
+    def active(self, moment=None):
+        """Mask of the sessions whose window contains ``moment`` (default now)"""
+        local = _local(moment)
+        moment = np.datetime64(local, 's')
+        after_start = np.isnat(self.window_starts) | (self.window_starts <= moment)
+        before_end = np.isnat(self.window_ends) | (moment <= self.window_ends)
+
+        # Daily windows like profiles.in_daily_window, running over midnight when they end before they start
+        current = _seconds(local)
+        starts, ends = self.daily_starts, self.daily_ends
+        in_daily = np.where(
+            starts < ends, (starts <= current) & (current < ends), (current >= starts) | (current < ends)
+        )
+        return np.where(self.dated, after_start & before_end, ~self.timed | in_daily)
+
+    def cycle_at(self, moment=None):
+        """Milliseconds of one cycle through the sessions active at ``moment``"""
+        return int(self.durations[self.active(moment)].sum())
+
+    @property
+    def daily_seconds(self):
+        """Seconds per day the show runs according to Frame1/Frame0"""
+        start = _seconds(self.frame1) if self.frame1 else 0
+        end = _seconds(self.frame0) if self.frame0 else SECONDS_PER_DAY
+        if start == end:
+            return SECONDS_PER_DAY
+        # A window ending before it starts runs over midnight
+        return (end - start) % SECONDS_PER_DAY
+
+    def cycles_per_day(self, moment=None):
+        cycle = self.cycle_at(moment)
+        return self.daily_seconds * 1000 / cycle if cycle else None
+
+    def sessions(self, moment=None):
+        """Per session durations as dicts, for display"""
+        active = self.active(moment)
+        return [
+            {
+                'session_order': int(order),
+                'text': int(text),
+                'animation': int(animation),
+                'duration': int(duration),
+                'active': bool(is_active),
+            }
+            for order, text, animation, duration, is_active in zip(
+                self.session_orders, self.text_durations, self.animation_durations, self.durations, active
+            )
+        ]
+
+
+def _local(moment):
+    return timezone.localtime(moment).replace(tzinfo=None)
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _datetimes(dates, times, default_time):
+    """Combine date and time columns into datetime64[s], NaT where the date is missing"""
+    days = np.array(dates, dtype='datetime64[D]').astype('datetime64[s]')
+    seconds = np.array([_seconds(value or default_time) for value in times], dtype='timedelta64[s]')
+    return days + seconds
+
+
+def compute_durations(rows, width=None):
+    """
+    Compute durations for rows of FIELDS ordered by show and session order.
+
+    Returns {led_content_id: ShowDuration} without the daily windows.
+    """
+    width = width or settings.LED_MATRIX_WIDTH
+    if not rows:
+        return {}
+    columns = dict(zip(FIELDS, zip(*rows)))
+
+    shows = np.array(columns['led_content_id'])
+    delay = np.maximum(np.array(columns['delay'], dtype=np.int64), 1)
+
+    # Text scroll time, sessions without text repeat the last text of the same show
+    has_text = np.array([content is not None for content in columns['text__content']])
+    widths = np.array([text_width(content or '') for content in columns['text__content']], dtype=np.int64)
+    starts = np.array([index or 0 for index in columns['text__start_index']], dtype=np.int64)
+    first_of_show = np.r_[True, shows[1:] != shows[:-1]]
+    source = np.maximum.accumulate(np.where(has_text | first_of_show, np.arange(len(rows)), 0))
+    text_x = np.where(has_text[source], np.minimum(starts[source], width), width)
+    scroll_steps = np.maximum(widths[source] - (width - text_x), 0)
+    text_durations = (scroll_steps + 1) * delay
+
+    # Animation time
+    image_count = np.array(columns['image_count'], dtype=np.int64)
+    loop_count = np.array([count or 0 for count in columns['animation__loop_count']], dtype=np.int64)
+    interval = np.maximum(
+        np.array([value or 0 for value in columns['animation__time_between_images']], dtype=np.int64), 1
+    )
+    animation_durations = image_count * loop_count * interval
+
+    durations = np.maximum(text_durations, animation_durations)
+
+    # Absolute date windows, where a time of day applies to the date (see validation)
+    start_dates = np.array(columns['start_date'], dtype='datetime64[D]')
+    end_dates = np.array(columns['end_date'], dtype='datetime64[D]')
+    dated = ~np.isnat(start_dates) | ~np.isnat(end_dates)
+    window_starts = _datetimes(columns['start_date'], columns['start_time'], time.min)
+    window_ends = _datetimes(columns['end_date'], columns['end_time'], time.max)
+
+    # Undated sessions with times run daily, end times are inclusive
+    daily_starts = np.array([_seconds(value) if value else 0 for value in columns['start_time']], dtype=np.int64)
+    daily_ends = np.array(
+        [_seconds(value) + 1 if value else SECONDS_PER_DAY for value in columns['end_time']], dtype=np.int64
+    )
+    has_time = np.array([
+        start is not None or end is not None for start, end in zip(columns['start_time'], columns['end_time'])
+    ])
+    timed = ~dated & has_time
+
+    orders = np.array(columns['session_order'])
+    bounds = np.flatnonzero(first_of_show)
+    result = {}
+    for start, end in zip(bounds, np.r_[bounds[1:], len(rows)]):
+        part = slice(start, end)
+        result[int(shows[start])] = ShowDuration(
+            orders[part], text_durations[part], animation_durations[part], durations[part],
+            window_starts[part], window_ends[part], dated[part],
+            daily_starts[part], daily_ends[part], timed[part],
+        )
+    return result
+
+
+def duration_key(led_content, width):
+    return f"content:durations:{led_content.version}:{width}"
+
+
+def get_show_durations(led_contents, width=None):
+    """
+    Return {pk: ShowDuration} for the given shows.
+
+    Costs one cache lookup plus, for shows whose version is not cached yet,
+    a single query over all their sessions.
+    """
+    width = width or settings.LED_MATRIX_WIDTH
+    led_contents = list(led_contents)
+    keys = {led_content.pk: duration_key(led_content, width) for led_content in led_contents}
+    cached = cache.get_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in cached]
+    if missing:
+        rows = list(
+            ContentSession.objects.filter(led_content__in=missing)
+            .annotate(image_count=Count('animation__animation_images'))
+            .order_by('led_content_id', 'session_order')
+            .values_list(*FIELDS)
+        )
+        computed = compute_durations(rows, width)
+        empty = np.array([], dtype=np.int64)
+        no_windows = np.array([], dtype='datetime64[s]')
+        no_flags = np.array([], dtype=bool)
+        rendered = {
+            keys[pk]: computed.get(pk) or ShowDuration(
+                empty, empty, empty, empty, no_windows, no_windows, no_flags, empty, empty, no_flags
+            )
+            for pk in missing
+        }
+        cache.set_many(rendered, None)
+        cached.update(rendered)
+
+    return {
+        led_content.pk: cached[keys[led_content.pk]]._replace(
+            frame1=led_content.start_time, frame0=led_content.end_time
+        )
+        for led_content in led_contents
+    }
+
+
+def get_show_duration(led_content, width=None):
+    return get_show_durations([led_content], width)[led_content.pk]
+
+
+def format_duration(milliseconds):
+    """Human readable duration, e.g. '2 min 5.3 s'"""
+    if milliseconds is None:
+        return '-'
+    minutes, seconds = divmod(milliseconds / 1000, 60)
+    hours, minutes = divmod(int(minutes), 60)
+    if hours:
+        return f"{hours} h {minutes} min"
+    if minutes:
+        return f"{minutes} min {seconds:.1f} s"
+    return f"{seconds:.1f} s"
@@ -4,6 +4,9 @@ from django.db import models
 from django.core.exceptions import ValidationError
 
 
+HEX_COLOR_RE = re.compile(r'^#[0-9a-fA-F]{6}$')
+
+
 class ColorWidget(forms.TextInput):
     input_type = 'color'
     
@@ -12,13 +15,65 @@ class ColorWidget(forms.TextInput):
             return ''
         if isinstance(value, str):
             return value
+        if isinstance(value, int):
+            return packed_to_hex(value)
         # Convert RGB tuple/list to hex
         if isinstance(value, (list, tuple)) and len(value) == 3:
             return '#{:02x}{:02x}{:02x}'.format(*value)
         return value
 
 
+class ColorFormField(forms.CharField):
+    """#RRGGBB input cleaned to a packed 0xRRGGBB integer"""
+    widget = ColorWidget
+
+    def prepare_value(self, value):
+        if isinstance(value, int):
+            return packed_to_hex(value)
+        return value
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        if value in self.empty_values:
+            return None
+        if not HEX_COLOR_RE.match(value):
+            raise ValidationError('Color must be in format #RRGGBB')
+        return int(value[1:], 16)
+
+
+class PackedColorField(models.PositiveIntegerField):
+    """
+    Color stored as a packed 24-bit 0xRRGGBB integer.
+
+    Accepts packed integers, #RRGGBB strings and RGB tuples/lists.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('default', 0x00ff00)  # Default green color
+        super().__init__(*args, **kwargs)
+
+    def formfield(self, **kwargs):
+        kwargs['widget'] = ColorWidget
+        # Skip the integer form field bounds, colors are edited as #RRGGBB text
+        return models.Field.formfield(self, **{'form_class': ColorFormField, **kwargs})
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        return to_packed(value)
+
+    def validate(self, value, model_instance):
+        super().validate(value, model_instance)
+        if value is not None and not 0 <= value <= 0xffffff:
+            raise ValidationError('Color must be a 24-bit RGB value')
+
+    def get_prep_value(self, value):
+        return super().get_prep_value(self.to_python(value))
+
+
 class ColorField(models.CharField):
+    """#RRGGBB string storage, superseded by PackedColorField and kept for the historical migrations"""
+
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('max_length', 7)
         kwargs.setdefault('default', '#00ff00')  # Default green color
@@ -32,7 +87,7 @@ class ColorField(models.CharField):
         value = super().clean(value, model_instance)
         if value:
             # Validate hex color format
-            if not re.match(r'^#[0-9a-fA-F]{6}$', value):
+            if not HEX_COLOR_RE.match(value):
                 raise ValidationError('Color must be in format #RRGGBB')
         return value
 
@@ -62,10 +117,35 @@ def hex_to_rgb(hex_color):
         return (0, 255, 0)  # Default green
 
 
+def pack_rgb(r, g, b):
+    """Pack RGB values into a 0xRRGGBB integer"""
+    return (max(0, min(255, r)) << 16) | (max(0, min(255, g)) << 8) | max(0, min(255, b))
+
+
+def unpack_rgb(packed):
+    """Split a 0xRRGGBB integer into an RGB tuple"""
+    return (packed >> 16) & 0xff, (packed >> 8) & 0xff, packed & 0xff
+
+
+def to_packed(value):
+    """Convert a packed integer, #RRGGBB string or RGB tuple/list to a packed integer"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and HEX_COLOR_RE.match(value):
+        return int(value[1:], 16)
+    if isinstance(value, (list, tuple)) and len(value) == 3:
+        return pack_rgb(*value)
+    raise ValidationError('Color must be in format #RRGGBB')
+
+
+def packed_to_hex(packed):
+    return '#{:06x}'.format(packed)
+
+
 def rgb_to_hex(r, g, b):
     """Convert RGB values to hex color"""
     return '#{:02x}{:02x}{:02x}'.format(
         max(0, min(255, r)),
         max(0, min(255, g)), 
         max(0, min(255, b))
-    )
\ No newline at end of file
+    )
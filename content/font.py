@@ -0,0 +1,142 @@
+"""5x7 bitmap font used to simulate text on the LED matrix"""
+import numpy as np
+
+
+GLYPH_WIDTH = 5
+GLYPH_HEIGHT = 7
+GLYPH_SPACING = 1
+
+# Column-major glyph data, bit 0 is the top row
+_GLYPH_COLUMNS = {
+    ' ': (0x00, 0x00, 0x00, 0x00, 0x00),
+    '!': (0x00, 0x00, 0x5F, 0x00, 0x00),
+    '"': (0x00, 0x07, 0x00, 0x07, 0x00),
+    '#': (0x14, 0x7F, 0x14, 0x7F, 0x14),
+    '$': (0x24, 0x2A, 0x7F, 0x2A, 0x12),
+    '%': (0x23, 0x13, 0x08, 0x64, 0x62),
+    '&': (0x36, 0x49, 0x55, 0x22, 0x50),
+    "'": (0x00, 0x05, 0x03, 0x00, 0x00),
+    '(': (0x00, 0x1C, 0x22, 0x41, 0x00),
+    ')': (0x00, 0x41, 0x22, 0x1C, 0x00),
+    '*': (0x08, 0x2A, 0x1C, 0x2A, 0x08),
+    '+': (0x08, 0x08, 0x3E, 0x08, 0x08),
+    ',': (0x00, 0x50, 0x30, 0x00, 0x00),
+    '-': (0x08, 0x08, 0x08, 0x08, 0x08),
+    '.': (0x00, 0x60, 0x60, 0x00, 0x00),
+    '/': (0x20, 0x10, 0x08, 0x04, 0x02),
+    '0': (0x3E, 0x51, 0x49, 0x45, 0x3E),
+    '1': (0x00, 0x42, 0x7F, 0x40, 0x00),
+    '2': (0x42, 0x61, 0x51, 0x49, 0x46),
+    '3': (0x21, 0x41, 0x45, 0x4B, 0x31),
+    '4': (0x18, 0x14, 0x12, 0x7F, 0x10),
+    '5': (0x27, 0x45, 0x45, 0x45, 0x39),
+    '6': (0x3C, 0x4A, 0x49, 0x49, 0x30),
+    '7': (0x01, 0x71, 0x09, 0x05, 0x03),
+    '8': (0x36, 0x49, 0x49, 0x49, 0x36),
+    '9': (0x06, 0x49, 0x49, 0x29, 0x1E),
+    ':': (0x00, 0x36, 0x36, 0x00, 0x00),
+    ';': (0x00, 0x56, 0x36, 0x00, 0x00),
+    '<': (0x08, 0x14, 0x22, 0x41, 0x00),
+    '=': (0x14, 0x14, 0x14, 0x14, 0x14),
+    '>': (0x00, 0x41, 0x22, 0x14, 0x08),
+    '?': (0x02, 0x01, 0x51, 0x09, 0x06),
+    '@': (0x32, 0x49, 0x79, 0x41, 0x3E),
+    'A': (0x7E, 0x11, 0x11, 0x11, 0x7E),
+    'B': (0x7F, 0x49, 0x49, 0x49, 0x36),
+    'C': (0x3E, 0x41, 0x41, 0x41, 0x22),
+    'D': (0x7F, 0x41, 0x41, 0x22, 0x1C),
+    'E': (0x7F, 0x49, 0x49, 0x49, 0x41),
+    'F': (0x7F, 0x09, 0x09, 0x01, 0x01),
+    'G': (0x3E, 0x41, 0x41, 0x51, 0x32),
+    'H': (0x7F, 0x08, 0x08, 0x08, 0x7F),
+    'I': (0x00, 0x41, 0x7F, 0x41, 0x00),
+    'J': (0x20, 0x40, 0x41, 0x3F, 0x01),
+    'K': (0x7F, 0x08, 0x14, 0x22, 0x41),
+    'L': (0x7F, 0x40, 0x40, 0x40, 0x40),
+    'M': (0x7F, 0x02, 0x04, 0x02, 0x7F),
+    'N': (0x7F, 0x04, 0x08, 0x10, 0x7F),
+    'O': (0x3E, 0x41, 0x41, 0x41, 0x3E),
+    'P': (0x7F, 0x09, 0x09, 0x09, 0x06),
+    'Q': (0x3E, 0x41, 0x51, 0x21, 0x5E),
+    'R': (0x7F, 0x09, 0x19, 0x29, 0x46),
+    'S': (0x46, 0x49, 0x49, 0x49, 0x31),
+    'T': (0x01, 0x01, 0x7F, 0x01, 0x01),
+    'U': (0x3F, 0x40, 0x40, 0x40, 0x3F),
+    'V': (0x1F, 0x20, 0x40, 0x20, 0x1F),
+    'W': (0x7F, 0x20, 0x18, 0x20, 0x7F),
+    'X': (0x63, 0x14, 0x08, 0x14, 0x63),
+    'Y': (0x03, 0x04, 0x78, 0x04, 0x03),
+    'Z': (0x61, 0x51, 0x49, 0x45, 0x43),
+    '[': (0x00, 0x7F, 0x41, 0x41, 0x00),
+    '\\': (0x02, 0x04, 0x08, 0x10, 0x20),
+    ']': (0x00, 0x41, 0x41, 0x7F, 0x00),
+    '^': (0x04, 0x02, 0x01, 0x02, 0x04),
+    '_': (0x40, 0x40, 0x40, 0x40, 0x40),
+    '`': (0x00, 0x01, 0x02, 0x04, 0x00),
+    'a': (0x20, 0x54, 0x54, 0x54, 0x78),
+    'b': (0x7F, 0x48, 0x44, 0x44, 0x38),
+    'c': (0x38, 0x44, 0x44, 0x44, 0x20),
+    'd': (0x38, 0x44, 0x44, 0x48, 0x7F),
+    'e': (0x38, 0x54, 0x54, 0x54, 0x18),
+    'f': (0x08, 0x7E, 0x09, 0x01, 0x02),
+    'g': (0x0C, 0x52, 0x52, 0x52, 0x3E),
+    'h': (0x7F, 0x08, 0x04, 0x04, 0x78),
+    'i': (0x00, 0x44, 0x7D, 0x40, 0x00),
+    'j': (0x20, 0x40, 0x44, 0x3D, 0x00),
+    'k': (0x7F, 0x10, 0x28, 0x44, 0x00),
+    'l': (0x00, 0x41, 0x7F, 0x40, 0x00),
+    'm': (0x7C, 0x04, 0x18, 0x04, 0x78),
+    'n': (0x7C, 0x08, 0x04, 0x04, 0x78),
+    'o': (0x38, 0x44, 0x44, 0x44, 0x38),
+    'p': (0x7C, 0x14, 0x14, 0x14, 0x08),
+    'q': (0x08, 0x14, 0x14, 0x18, 0x7C),
+    'r': (0x7C, 0x08, 0x04, 0x04, 0x08),
+    's': (0x48, 0x54, 0x54, 0x54, 0x20),
+    't': (0x04, 0x3F, 0x44, 0x40, 0x20),
+    'u': (0x3C, 0x40, 0x40, 0x20, 0x7C),
+    'v': (0x1C, 0x20, 0x40, 0x20, 0x1C),
+    'w': (0x3C, 0x40, 0x30, 0x40, 0x3C),
+    'x': (0x44, 0x28, 0x10, 0x28, 0x44),
+    'y': (0x0C, 0x50, 0x50, 0x50, 0x3C),
+    'z': (0x44, 0x64, 0x54, 0x4C, 0x44),
+    '{': (0x00, 0x08, 0x36, 0x41, 0x00),
+    '|': (0x00, 0x00, 0x7F, 0x00, 0x00),
+    '}': (0x00, 0x41, 0x36, 0x08, 0x00),
+    '~': (0x08, 0x04, 0x08, 0x10, 0x08),
+    'Ä': (0x79, 0x14, 0x12, 0x14, 0x79),
+    'Ö': (0x39, 0x44, 0x44, 0x44, 0x39),
+    'Ü': (0x3D, 0x40, 0x40, 0x40, 0x3D),
+    'ä': (0x20, 0x55, 0x54, 0x55, 0x78),
+    'ö': (0x38, 0x45, 0x44, 0x45, 0x38),
+    'ü': (0x3C, 0x41, 0x40, 0x21, 0x7C),
+    'ß': (0x7E, 0x01, 0x49, 0x56, 0x20),
+    '€': (0x14, 0x3E, 0x55, 0x41, 0x22),
+}
+_FALLBACK = '?'
+
+_CHARS = list(_GLYPH_COLUMNS)
+_CHAR_INDEX = {char: index for index, char in enumerate(_CHARS)}
+
+# (glyph, row, column) boolean lookup table, padded with the spacing column
+_GLYPHS = np.zeros((len(_CHARS), GLYPH_HEIGHT, GLYPH_WIDTH + GLYPH_SPACING), dtype=bool)
+_GLYPHS[:, :, :GLYPH_WIDTH] = (
+    (np.array(list(_GLYPH_COLUMNS.values()), dtype=np.uint8)[:, None, :] >> np.arange(GLYPH_HEIGHT)[None, :, None]) & 1
+).astype(bool)
+
+
+def text_width(text):
+    """Return the rendered width of ``text`` in pixels"""
+    if not text:
+        return 0
+    return len(text) * (GLYPH_WIDTH + GLYPH_SPACING) - GLYPH_SPACING
+
+
+def render_text(text):
+    """Return ``text`` as a (GLYPH_HEIGHT, text_width(text)) boolean bitmap"""
+    if not text:
+        return np.zeros((GLYPH_HEIGHT, 0), dtype=bool)
+    fallback = _CHAR_INDEX[_FALLBACK]
+    indexes = np.fromiter((_CHAR_INDEX.get(char, fallback) for char in text), dtype=np.intp, count=len(text))
+    # (chars, rows, cols) -> (rows, chars * cols)
+    bitmap = _GLYPHS[indexes].transpose(1, 0, 2).reshape(GLYPH_HEIGHT, -1)
+    return bitmap[:, :text_width(text)]
@@ -0,0 +1,264 @@
+"""
+Per-session render cache.
+
+Each session is rendered once into a fragment holding its .def lines and
+its JSON representation, cached under the session's updated_at stamp.
+Composing a show only renders the sessions whose stamp changed; the
+cross-session rules of the .def format (repeating the previous text and
+the ``Next`` separators) are applied when the fragments are stitched.
+
+Large shows can be streamed with iter_def, which walks the sessions in
+chunks and yields .def text as it goes, so memory stays bounded by the
+chunk size instead of the show size. The ``a``-prefixed functions are the
+async ORM and async cache counterparts used by the async views.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ContentSession
+
+
+def fragment_key(session_pk, updated_at):
+    return f"content:session:{session_pk}:{updated_at.timestamp():.6f}"
+
+
+def _schedule_parts(day, moment):
+    parts = []
+    if day:
+        parts.append(day.strftime('%Y-%m-%d'))
+    if moment:
+        parts.append(moment.strftime('%H:%M'))
+    return parts
+
+
+def render_def_fragment(session):
+    """Render the .def lines of a single loaded session"""
+    head = []
+
+    # Add Start= line if date or time is specified
+    start_parts = _schedule_parts(session.start_date, session.start_time)
+    if start_parts:
+        head.append(f'Start={" ".join(start_parts)}')
+
+    # Add End= line if date or time is specified
+    end_parts = _schedule_parts(session.end_date, session.end_time)
+    if end_parts:
+        head.append(f'End={" ".join(end_parts)}')
+
+    # Add lines for this session (before text)
+    for line in sorted(session.lines.all(), key=lambda line: line.start_index):
+        r, g, b = line.color_rgb
+        head.append(f'Line={line.start_index},{r},{g},{b}')
+
+    # Add text configuration, whether a missing text is repeated is decided when stitching
+    text_lines = None
+    text = getattr(session, 'text', None)
+    if text is not None:
+        r, g, b = text.color_rgb
+        text_lines = [f'Text={text.start_index},{text.content}', f'Color={r},{g},{b}']
+
+    # Add animation configuration (after text)
+    tail = []
+    animation = getattr(session, 'animation', None)
+    if animation is not None:
+        image_list = animation.get_image_list()
+        # Format: Animation=l,t,n,<Bildname1>,<Bildname2>,...
+        animation_parts = [
+            str(animation.loop_count),
+            str(animation.time_between_images),
+            str(len(image_list))
+        ] + image_list
+        tail.append(f'Animation={",".join(animation_parts)}')
+
+    # Add delay
+    tail.append(f'Delay={session.delay}')
+
+    return {'head': head, 'text': text_lines, 'animation': animation is not None, 'tail': tail}
+
+
+def render_fragment(session):
+    """Render the .def and JSON fragments of a single loaded session"""
+    from .serializers import ContentSessionSerializer  # serializers composes shows from fragments
+
+    return {
+        'def': render_def_fragment(session),
+        'json': dict(ContentSessionSerializer(session).data),
+    }
+
+
+def _fragment_keys(stamps):
+    return {pk: fragment_key(pk, updated_at) for pk, updated_at in stamps}
+
+
+def _load_fragments(stamps):
+    """Return the fragments of (pk, updated_at) stamps with one cache lookup, rendering the misses"""
+    keys = _fragment_keys(stamps)
+    fragments = cache.get_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in fragments]
+    if missing:
+        rendered = {
+            keys[session.pk]: render_fragment(session)
+            for session in ContentSession.objects.with_related().filter(pk__in=missing)
+        }
+        cache.set_many(rendered, None)
+        fragments.update(rendered)
+
+    return [fragments[keys[pk]] for pk, _ in stamps]
+
+
+def get_session_fragments(led_content):
+    """
+    Return the fragments of all sessions of a show in session order.
+
+    Costs one query for the session stamps and one cache lookup; only
+    sessions without a cached fragment are loaded and rendered.
+    """
+    return _load_fragments(list(led_content.sessions.order_by('session_order').values_list('pk', 'updated_at')))
+
+
+def iter_session_fragments(led_content, chunk_size=None):
+    """
+    Yield the fragments of all sessions of a show in session order, ``chunk_size`` at a time.
+
+    The session stamps are read through a chunked cursor and every chunk
+    costs one cache lookup, plus one prefetching query for cache misses.
+    """
+    chunk_size = chunk_size or settings.LED_DEF_STREAM_CHUNK_SIZE
+    stamps = led_content.sessions.order_by('session_order').values_list('pk', 'updated_at').iterator(chunk_size)
+    while chunk := list(islice(stamps, chunk_size)):
+        yield from _load_fragments(chunk)
+
+
+async def _aload_fragments(stamps):
+    """Async counterpart of _load_fragments"""
+    keys = _fragment_keys(stamps)
+    fragments = await cache.aget_many(keys.values())
+
+    missing = [pk for pk, key in keys.items() if key not in fragments]
+    if missing:
+        rendered = {
+            keys[session.pk]: render_fragment(session)
+            async for session in ContentSession.objects.with_related().filter(pk__in=missing)
+        }
+        await cache.aset_many(rendered, None)
+        fragments.update(rendered)
+
+    return [fragments[keys[pk]] for pk, _ in stamps]
+
+
+async def aget_session_fragments(led_content):
+    """Async counterpart of get_session_fragments"""
+    stamps = [stamp async for stamp in led_content.sessions.order_by('session_order').values_list('pk', 'updated_at')]
+    return await _aload_fragments(stamps)
+
+
+async def aiter_session_fragments(led_content, chunk_size=None):
+    """Async counterpart of iter_session_fragments"""
+    chunk_size = chunk_size or settings.LED_DEF_STREAM_CHUNK_SIZE
+    # values() rather than values_list(), whose iterable runs the query before aiterator() moves it to a thread
+    stamps = led_content.sessions.order_by('session_order').values('pk', 'updated_at')
+    chunk = []
+    async for stamp in stamps.aiterator(chunk_size):
+        chunk.append((stamp['pk'], stamp['updated_at']))
+        if len(chunk) == chunk_size:
+            for fragment in await _aload_fragments(chunk):
+                yield fragment
+            chunk = []
+    if chunk:
+        for fragment in await _aload_fragments(chunk):
+            yield fragment
+
+
+def def_header(led_content):
+    lines = []
+
+    # Add global Frame1 (daily start) if configured
+    if led_content.start_time:
+        lines.append(f'Frame1={led_content.start_time.strftime("%H:%M")}')
+
+    # Add global Frame0 (daily end) if configured
+    if led_content.end_time:
+        lines.append(f'Frame0={led_content.end_time.strftime("%H:%M")}')
+
+    return lines
+
+
+class DefStitcher:
+    """Applies the cross-session text and Next rules to session .def fragments one at a time"""
+
+    def __init__(self):
+        self.count = 0
+        self.has_text = False  # Track whether a text was shown for repetition logic
+
+    def lines(self, fragment):
+        # Add 'Next' separator between sessions
+        if self.count:
+            yield 'Next'
+        self.count += 1
+
+        yield from fragment['head']
+        if fragment['text'] is not None:
+            yield from fragment['text']
+            self.has_text = True
+        elif fragment['animation'] and not self.has_text:
+            # First animation without preceding text - add empty text
+            yield 'Text='
+        # If has_animation and a text was shown before, it is repeated (no Text= line)
+        yield from fragment['tail']
+
+
+def iter_def_lines(header, fragments):
+    """Yield the .def lines of session fragments, applying the cross-session text and Next rules"""
+    yield from header
+    stitcher = DefStitcher()
+    for fragment in fragments:
+        yield from stitcher.lines(fragment)
+
+
+def iter_def_chunks(lines, lines_per_chunk=1000):
+    """Join .def lines into text chunks of ``lines_per_chunk`` lines"""
+    separator = ''
+    while chunk := list(islice(lines, lines_per_chunk)):
+        yield separator + '\n'.join(chunk)
+        separator = '\n'
+
+
+def stitch_def(header, fragments):
+    """Join session .def fragments, applying the cross-session text and Next rules"""
+    return '\n'.join(iter_def_lines(header, fragments))
+
+
+def render_def(led_content):
+    """Generate the .def format text of a show from its cached session fragments"""
+    fragments = [fragment['def'] for fragment in get_session_fragments(led_content)]
+    return stitch_def(def_header(led_content), fragments)
+
+
+def iter_def(led_content, chunk_size=None, lines_per_chunk=1000):
+    """
+    Yield the .def format text of a show in chunks, see render_def.
+
+    The joined chunks equal render_def; only ``chunk_size`` sessions and
+    ``lines_per_chunk`` output lines are held in memory at a time.
+    """
+    fragments = (fragment['def'] for fragment in iter_session_fragments(led_content, chunk_size))
+    return iter_def_chunks(iter_def_lines(def_header(led_content), fragments), lines_per_chunk)
+
+
+async def aiter_def(led_content, chunk_size=None):
+    """Async counterpart of iter_def, yields the text of up to ``chunk_size`` sessions at a time"""
+    header = def_header(led_content)
+    stitcher = DefStitcher()
+    lines = list(header)
+    separator = ''
+    async for fragment in aiter_session_fragments(led_content, chunk_size):
+        lines.extend(stitcher.lines(fragment['def']))
+        if stitcher.count % (chunk_size or settings.LED_DEF_STREAM_CHUNK_SIZE) == 0:
+            yield separator + '\n'.join(lines)
+            separator, lines = '\n', []
+    if lines:
+        yield separator + '\n'.join(lines)
+
@@ -0,0 +1,137 @@
+"""
+Content-addressed version history of shows.
+
+Every session subtree is stored once as a SessionBlob under the SHA-256 of
+its canonical JSON (see content.cloning.session_spec, minus the session
+order). A ShowVersion is just the show settings plus an ordered list of
+(session_order, blob hash) pairs, so recording a version only stores the
+sessions that changed, diffs compare hash lists without loading any
+session, and a restore re-creates the sessions with bulk inserts.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+
+from .cloning import create_sessions, session_specs
+from .models import LEDContent, SessionBlob, ShowVersion, muted_touches, touch_led_content
+
+
+def content_hash(data):
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def show_header(led_content):
+    return {
+        'title': led_content.title,
+        'start_time': led_content.start_time.isoformat() if led_content.start_time else None,
+        'end_time': led_content.end_time.isoformat() if led_content.end_time else None,
+    }
+
+
+def record_version(led_content, created_by=None, note=''):
+    """
+    Record the current state of a show, unless it equals the latest version.
+
+    Returns the new (or unchanged latest) ShowVersion.
+    """
+    blobs = {}
+    sessions = []
+    for spec in session_specs(led_content):
+        order = spec.pop('session_order')
+        blob_hash = content_hash(spec)
+        blobs[blob_hash] = spec
+        sessions.append([order, blob_hash])
+
+    header = show_header(led_content)
+    version_hash = content_hash({'header': header, 'sessions': sessions})
+
+    with transaction.atomic():
+        latest = led_content.versions.order_by('-number').first()
+        if latest is not None and latest.hash == version_hash:
+            return latest
+
+        SessionBlob.objects.bulk_create(
+            [SessionBlob(hash=blob_hash, data=data) for blob_hash, data in blobs.items()],
+            ignore_conflicts=True,
+        )
+        return ShowVersion.objects.create(
+            led_content=led_content,
+            number=(latest.number + 1) if latest is not None else 1,
+            hash=version_hash,
+            header=header,
+            sessions=sessions,
+            created_by=created_by,
+            note=note,
+        )
+
+
+def summarize(data):
+    """Short human readable description of a session blob"""
+    if data['text'] is not None:
+        return f"Text: {data['text']['content'][:30]}"
+    if data['animation'] is not None:
+        return f"Animation ({len(data['animation']['images'])} images)"
+    return f"{len(data['lines'])} lines"
+
+
+def diff_versions(old, new):
+    """
+    Compare two versions of the same show.
+
+    Sessions are matched by session order. Returns a list of changes as
+    dicts with ``change`` (settings, added, removed or changed), the
+    affected session orders and a summary. Only the blobs of changed
+    sessions are loaded, in a single query.
+    """
+    changes = [
+        {'change': 'settings', 'field': field, 'old': old.header.get(field), 'new': new.header.get(field)}
+        for field in sorted(set(old.header) | set(new.header))
+        if old.header.get(field) != new.header.get(field)
+    ]
+
+    old_sessions = dict(old.sessions)
+    new_sessions = dict(new.sessions)
+    operations = []
+    for order in sorted(old_sessions.keys() | new_sessions.keys()):
+        a = (order, old_sessions[order]) if order in old_sessions else None
+        b = (order, new_sessions[order]) if order in new_sessions else None
+        if a is None:
+            operations.append(('added', a, b))
+        elif b is None:
+            operations.append(('removed', a, b))
+        elif a[1] != b[1]:
+            operations.append(('changed', a, b))
+
+    needed = {entry[1] for _, a, b in operations for entry in (a, b) if entry is not None}
+    data = dict(SessionBlob.objects.filter(hash__in=needed).values_list('hash', 'data'))
+    for change, a, b in operations:
+        changes.append({
+            'change': change,
+            'old_session_order': a[0] if a else None,
+            'new_session_order': b[0] if b else None,
+            'old': summarize(data[a[1]]) if a else None,
+            'new': summarize(data[b[1]]) if b else None,
+        })
+    return changes
+
+
+def restore_version(version, created_by=None):
+    """Replace the sessions and settings of a show with a recorded version"""
+    led_content = version.led_content
+    data = dict(SessionBlob.objects.filter(hash__in=set(version.session_hashes)).values_list('hash', 'data'))
+    specs = [{**data[blob_hash], 'session_order': order} for order, blob_hash in version.sessions]
+
+    with transaction.atomic():
+        with muted_touches():
+            led_content.sessions.all().delete()
+            create_sessions(led_content, specs)
+        LEDContent.objects.filter(pk=led_content.pk).update(
+            title=version.header['title'],
+            start_time=version.header['start_time'],
+            end_time=version.header['end_time'],
+        )
+        touch_led_content(pk=led_content.pk)
+        led_content.refresh_from_db()
+        return record_version(led_content, created_by, note=f"Restored version {version.number}")
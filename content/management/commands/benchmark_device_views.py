@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory, RequestFactory
+
+from content.async_views import AsyncLEDContentAPIView, AsyncLEDContentDefTestView, AsyncLEDContentDefView
+from content.views import LEDContentAPIView, LEDContentDefTestView, LEDContentDefView
+
+
+ENDPOINTS = {
+    'def': ('/api/content.txt', LEDContentDefView, AsyncLEDContentDefView),
+    'test': ('/api/test.txt', LEDContentDefTestView, AsyncLEDContentDefTestView),
+    'json': ('/api/content/', LEDContentAPIView, AsyncLEDContentAPIView),
+}
+
+
+def read_sync(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+async def read_async(response):
+    if not response.streaming:
+        return response.content
+    if response.is_async:
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return b''.join(response.streaming_content)
+
+
+class Command(BaseCommand):
+    help = "Compare throughput, latency, threads and memory of the sync and async device views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='def')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+
+    def handle(self, *args, endpoint, requests, concurrency, **options):
+        url, sync_view, async_view = ENDPOINTS[endpoint]
+        sync_view, async_view = sync_view.as_view(), async_view.as_view()
+
+        # Warm the caches so both paths measure serving, not the first render
+        body = read_sync(sync_view(RequestFactory().get(url)))
+        async_body = asyncio.run(self._serve_async(async_view, url))
+        if body != async_body:
+            self.stderr.write(self.style.ERROR('Sync and async responses differ'))
+
+        self.stdout.write(f'{url}: {len(body)} bytes, {requests} requests, concurrency {concurrency}')
+        self._report('sync', *self._measure(lambda: self._run_sync(sync_view, url, requests, concurrency)))
+        self._report('async', *self._measure(lambda: asyncio.run(self._run_async(async_view, url, requests, concurrency))))
+
+    def _measure(self, run):
+        tracemalloc.start()
+        started = time.perf_counter()
+        latencies, threads = run()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return latencies, threads, elapsed, peak
+
+    def _report(self, label, latencies, threads, elapsed, peak):
+        latencies = sorted(latencies)
+        self.stdout.write(
+            f'{label:>5}: {len(latencies) / elapsed:8.1f} req/s, '
+            f'p50 {statistics.median(latencies) * 1000:6.1f} ms, '
+            f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.1f} ms, '
+            f'peak threads {threads}, peak traced memory {peak / 1e6:.1f} MB'
+        )
+
+    def _run_sync(self, view, url, requests, concurrency):
+        factory = RequestFactory()
+        peak_threads = threading.active_count()
+
+        def serve(_):
+            nonlocal peak_threads
+            started = time.perf_counter()
+            read_sync(view(factory.get(url)))
+            peak_threads = max(peak_threads, threading.active_count())
+            return time.perf_counter() - started
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = list(pool.map(serve, range(requests)))
+        return latencies, peak_threads
+
+    async def _serve_async(self, view, url):
+        return await read_async(await view(AsyncRequestFactory().get(url)))
+
+    async def _run_async(self, view, url, requests, concurrency):
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+        peak_threads = threading.active_count()
+
+        async def serve():
+            nonlocal peak_threads
+            async with semaphore:
+                started = time.perf_counter()
+                await read_async(await view(factory.get(url)))
+                peak_threads = max(peak_threads, threading.active_count())
+                return time.perf_counter() - started
+
+        latencies = await asyncio.gather(*(serve() for _ in range(requests)))
+        return latencies, peak_threads
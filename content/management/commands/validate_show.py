@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from content.models import LEDContent
+from content.validation import ERROR, validate_show
+
+
+class Command(BaseCommand):
+    help = "Validate LED shows (images, lines, text size and schedule windows)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="LEDContent ids to validate")
+        parser.add_argument('--active', action='store_true', help="Validate the active show")
+        parser.add_argument('--test', action='store_true', help="Validate the test show")
+
+    def handle(self, *args, ids, active, test, **options):
+        shows = LEDContent.objects.none()
+        if ids:
+            shows |= LEDContent.objects.filter(pk__in=ids)
+        if active:
+            shows |= LEDContent.objects.filter(is_active=True)
+        if test:
+            shows |= LEDContent.objects.filter(is_test=True)
+        if not (ids or active or test):
+            shows = LEDContent.objects.all()
+
+        error_count = 0
+        for led_content in shows:
+            issues = validate_show(led_content)
+            error_count += sum(1 for issue in issues if issue.level == ERROR)
+            status = self.style.SUCCESS('OK') if not issues else self.style.WARNING(f'{len(issues)} issue(s)')
+            self.stdout.write(f'{led_content.pk} "{led_content}": {status}')
+            for issue in issues:
+                self.stdout.write(f'  {issue}')
+
+        if error_count:
+            raise CommandError(f'{error_count} error(s) found')
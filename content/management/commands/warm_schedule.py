@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from content.schedule import next_boundary, scheduled_shows, warm_show, warmer
+
+
+class Command(BaseCommand):
+    help = "Warm the render caches of the active and test show ahead of their schedule boundaries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Warm the current state once and exit")
+
+    def handle(self, *args, once, **options):
+        if once:
+            now = timezone.now()
+            for led_content in scheduled_shows():
+                warm_show(led_content, now)
+                boundary = next_boundary(led_content, now)
+                self.stdout.write(
+                    f'{led_content.pk} "{led_content}": warmed, next boundary '
+                    f'{timezone.localtime(boundary).isoformat() if boundary else "none"}'
+                )
+            return
+
+        # Only useful with a cache backend shared with the web processes
+        self.stdout.write('Warming caches ahead of schedule boundaries (Ctrl-C to stop)')
+        warmer.run_forever()
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0008_image_sessionanimation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionAnimationImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('animation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='animation_images', to='content.sessionanimation')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='animation_entries', to='content.image')),
+            ],
+            options={
+                'ordering': ['position'],
+                'unique_together': {('animation', 'position')},
+            },
+        ),
+        migrations.AddField(
+            model_name='sessionanimation',
+            name='images',
+            field=models.ManyToManyField(blank=True, related_name='animations', through='content.SessionAnimationImage', to='content.image'),
+        ),
+    ]
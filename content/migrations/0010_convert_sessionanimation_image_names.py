@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:40
+
+from django.db import migrations
+
+
+def image_names_to_entries(apps, schema_editor):
+    """Convert the comma-separated image_names into ordered SessionAnimationImage rows"""
+    Image = apps.get_model('content', 'Image')
+    SessionAnimation = apps.get_model('content', 'SessionAnimation')
+    SessionAnimationImage = apps.get_model('content', 'SessionAnimationImage')
+
+    parsed = {
+        animation.pk: [name.strip() for name in animation.image_names.split(',') if name.strip()]
+        for animation in SessionAnimation.objects.exclude(image_names='')
+    }
+    all_names = {name for names in parsed.values() for name in names}
+    images = Image.objects.in_bulk(all_names, field_name='name')
+
+    # Names that were never registered still have to survive the conversion
+    missing = all_names - set(images)
+    if missing:
+        Image.objects.bulk_create([
+            Image(name=name, description='Created while migrating animation image names')
+            for name in sorted(missing)
+        ])
+        images = Image.objects.in_bulk(all_names, field_name='name')
+
+    SessionAnimationImage.objects.bulk_create([
+        SessionAnimationImage(animation_id=animation_id, image=images[name], position=position)
+        for animation_id, names in parsed.items()
+        for position, name in enumerate(names)
+    ])
+
+
+def entries_to_image_names(apps, schema_editor):
+    SessionAnimation = apps.get_model('content', 'SessionAnimation')
+    SessionAnimationImage = apps.get_model('content', 'SessionAnimationImage')
+
+    names = {}
+    for entry in SessionAnimationImage.objects.select_related('image').order_by('animation_id', 'position'):
+        names.setdefault(entry.animation_id, []).append(entry.image.name)
+
+    animations = list(SessionAnimation.objects.filter(pk__in=names))
+    for animation in animations:
+        animation.image_names = ','.join(names[animation.pk])
+    SessionAnimation.objects.bulk_update(animations, ['image_names'])
+    # The forward conversion recreates the entries from image_names
+    SessionAnimationImage.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_sessionanimationimage'),
+    ]
+
+    operations = [
+        migrations.RunPython(image_names_to_entries, entries_to_image_names),
+    ]
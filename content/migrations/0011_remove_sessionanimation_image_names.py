@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 05:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_convert_sessionanimation_image_names'),
+    ]
+
+    operations = [
+        # A default lets the column be added back when migrating backwards
+        migrations.AlterField(
+            model_name='sessionanimation',
+            name='image_names',
+            field=models.CharField(blank=True, default='', help_text='Comma-separated image names (e.g., image1,image2,image3)', max_length=500, verbose_name='Image Names'),
+        ),
+        migrations.RemoveField(
+            model_name='sessionanimation',
+            name='image_names',
+        ),
+    ]
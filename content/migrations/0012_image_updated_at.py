@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 06:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_remove_sessionanimation_image_names'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-19 07:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_image_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ledcontent',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Bumped whenever the show or any of its sessions change'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_ledcontent_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentsession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Bumped whenever the session or any of its parts change'),
+        ),
+        migrations.AddField(
+            model_name='sessionanimation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='sessionline',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='sessiontext',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
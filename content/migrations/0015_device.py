@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_session_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Device',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('device_id', models.CharField(max_length=100, unique=True)),
+                ('checksum', models.CharField(blank=True, help_text='Checksum of the content the device is running', max_length=64)),
+                ('uptime', models.PositiveBigIntegerField(default=0, help_text='Seconds since the device booted')),
+                ('error_count', models.PositiveIntegerField(default=0, help_text='Errors reported by the device since boot')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['device_id'],
+            },
+        ),
+    ]
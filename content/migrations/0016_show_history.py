@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_device'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionBlob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ShowVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('hash', models.CharField(help_text='Hash over settings and sessions, equal for identical versions', max_length=64)),
+                ('header', models.JSONField(help_text='Title and daily Frame1/Frame0 window')),
+                ('sessions', models.JSONField(help_text='Ordered [session_order, blob hash] pairs')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('led_content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='content.ledcontent')),
+            ],
+            options={
+                'ordering': ['led_content', '-number'],
+                'unique_together': {('led_content', 'number')},
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+from django.db import migrations
+
+import content.fields
+from content.fields import hex_to_rgb, pack_rgb, packed_to_hex
+
+
+COLOR_MODELS = ['SessionText', 'SessionLine']
+
+
+def hex_to_packed(apps, schema_editor):
+    """Pack the #RRGGBB strings, invalid strings become green as they were rendered before"""
+    for model_name in COLOR_MODELS:
+        model = apps.get_model('content', model_name)
+        rows = list(model.objects.only('pk', 'color'))
+        for row in rows:
+            row.color_packed = pack_rgb(*hex_to_rgb(row.color))
+        model.objects.bulk_update(rows, ['color_packed'], batch_size=500)
+
+
+def packed_to_hex_strings(apps, schema_editor):
+    for model_name in COLOR_MODELS:
+        model = apps.get_model('content', model_name)
+        rows = list(model.objects.only('pk', 'color_packed'))
+        for row in rows:
+            row.color = packed_to_hex(row.color_packed)
+        model.objects.bulk_update(rows, ['color'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_show_history'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sessiontext',
+            name='color_packed',
+            field=content.fields.PackedColorField(default=65280),
+        ),
+        migrations.AddField(
+            model_name='sessionline',
+            name='color_packed',
+            field=content.fields.PackedColorField(default=16776960),
+        ),
+        migrations.RunPython(hex_to_packed, packed_to_hex_strings),
+        migrations.RemoveField(
+            model_name='sessiontext',
+            name='color',
+        ),
+        migrations.RemoveField(
+            model_name='sessionline',
+            name='color',
+        ),
+        migrations.RenameField(
+            model_name='sessiontext',
+            old_name='color_packed',
+            new_name='color',
+        ),
+        migrations.RenameField(
+            model_name='sessionline',
+            old_name='color_packed',
+            new_name='color',
+        ),
+    ]
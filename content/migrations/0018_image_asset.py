@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_packed_colors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='asset',
+            field=models.FileField(blank=True, help_text='Binary image as stored on the device, shipped to displays in image bundles', upload_to='images/'),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
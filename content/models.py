@@ -1,13 +1,54 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from .fields import ColorField, hex_to_rgb
+from django.utils import timezone
+from .fields import PackedColorField, unpack_rgb
+import hashlib
 import re
 
 
+IMAGE_NAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+
+# Cache key of the version probe (see content.probe), dropped whenever a version changes
+VERSION_PROBE_KEY = 'content:version-probe'
+
+
+_touches_muted = ContextVar('touches_muted', default=False)
+
+
+@contextmanager
+def muted_touches():
+    """Skip per-object updated_at bumps, for bulk operations that touch the show themselves"""
+    token = _touches_muted.set(True)
+    try:
+        yield
+    finally:
+        _touches_muted.reset(token)
+
+
+def touch_led_content(**lookup):
+    """Bump updated_at (and with it the version) of the shows matching ``lookup``"""
+    LEDContent.objects.filter(**lookup).update(updated_at=timezone.now())
+    cache.delete(VERSION_PROBE_KEY)
+
+
+def touch_content_sessions(**lookup):
+    """Bump updated_at of the sessions matching ``lookup`` and of their shows"""
+    now = timezone.now()
+    sessions = ContentSession.objects.filter(**lookup)
+    sessions.update(updated_at=now)
+    LEDContent.objects.filter(pk__in=sessions.values('led_content_id')).update(updated_at=now)
+    cache.delete(VERSION_PROBE_KEY)
+
+
 class LEDContent(models.Model):
     title = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Bumped whenever the show or any of its sessions change")
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     start_time = models.TimeField(null=True, blank=True, verbose_name="Frame1", help_text="Daily start time (hh:mm)")
     end_time = models.TimeField(null=True, blank=True, verbose_name="Frame0", help_text="Daily end time (hh:mm)")
@@ -27,20 +68,40 @@ class LEDContent(models.Model):
             LEDContent.objects.filter(is_test=True).exclude(pk=self.pk).update(is_test=False)
         super().save(*args, **kwargs)
 
+    @property
+    def version(self):
+        """Identifier of the current state of the show, used as cache key"""
+        return f"{self.pk}-{self.updated_at.timestamp():.6f}"
+
     def __str__(self):
         return self.title
 
 
+class ContentSessionQuerySet(models.QuerySet):
+    def with_related(self):
+        """Fetch the full session tree (text, lines, animation and its images) in bulk"""
+        return self.select_related('text', 'animation').prefetch_related(
+            'lines',
+            models.Prefetch(
+                'animation__animation_images',
+                queryset=SessionAnimationImage.objects.select_related('image')
+            ),
+        )
+
+
 class ContentSession(models.Model):
     led_content = models.ForeignKey(LEDContent, related_name='sessions', on_delete=models.CASCADE)
     session_order = models.PositiveIntegerField()
     delay = models.PositiveIntegerField(default=100)  # Animation delay in milliseconds
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, help_text="Bumped whenever the session or any of its parts change")
     start_date = models.DateField(blank=True, null=True, help_text="Optional: Start date (YYYY-MM-DD)")
     start_time = models.TimeField(blank=True, null=True, help_text="Optional: Start time (hh:mm)")
     end_date = models.DateField(blank=True, null=True, help_text="Optional: End date (YYYY-MM-DD)")
     end_time = models.TimeField(blank=True, null=True, help_text="Optional: End time (hh:mm)")
 
+    objects = ContentSessionQuerySet.as_manager()
+
     class Meta:
         ordering = ['session_order']
         unique_together = ['led_content', 'session_order']
@@ -53,12 +114,13 @@ class SessionText(models.Model):
     content_session = models.OneToOneField(ContentSession, related_name='text', on_delete=models.CASCADE)
     start_index = models.PositiveIntegerField()  # startIndex from API
     content = models.TextField()  # text content
-    color = ColorField(default='#00ff00')  # Default green color
+    color = PackedColorField(default=0x00ff00)  # Default green color
+    updated_at = models.DateTimeField(auto_now=True)
     
     @property
     def color_rgb(self):
         """Return color as RGB tuple for API serialization"""
-        return hex_to_rgb(self.color)
+        return unpack_rgb(self.color)
     
     def __str__(self):
         return f"{self.content_session} - Text: {self.content[:30]}"
@@ -67,7 +129,8 @@ class SessionText(models.Model):
 class SessionLine(models.Model):
     content_session = models.ForeignKey(ContentSession, related_name='lines', on_delete=models.CASCADE)
     start_index = models.PositiveIntegerField()  # startIndex from API
-    color = ColorField(default='#ffff00')  # Default yellow color
+    color = PackedColorField(default=0xffff00)  # Default yellow color
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['content_session', 'start_index']
@@ -75,7 +138,7 @@ class SessionLine(models.Model):
     @property
     def color_rgb(self):
         """Return color as RGB tuple for API serialization"""
-        return hex_to_rgb(self.color)
+        return unpack_rgb(self.color)
     
     def __str__(self):
         return f"{self.content_session} - Line {self.start_index}"
@@ -89,14 +152,47 @@ class Image(models.Model):
         help_text="Image identifier (a-z, A-Z, 0-9, _, -)"
     )
     description = models.CharField(max_length=255, blank=True)
+    asset = models.FileField(
+        upload_to='images/',
+        blank=True,
+        help_text="Binary image as stored on the device, shipped to displays in image bundles"
+    )
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    size = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Name of the asset file sha256 and size were computed from
+    _hashed_asset = None
 
     class Meta:
         ordering = ['name']
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'asset' in field_names and instance.sha256:
+            instance._hashed_asset = instance.asset.name
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self.asset:
+            self.sha256, self.size = '', 0
+        elif not self.asset._committed or self.asset.name != self._hashed_asset or not self.sha256:
+            # Hash new or replaced assets so bundles can be content addressed without reading files again.
+            # FieldFile.save() commits the file before saving the instance, hence the name comparison.
+            digest = hashlib.sha256()
+            self.asset.open('rb')
+            self.asset.seek(0)
+            for chunk in self.asset.chunks():
+                digest.update(chunk)
+            self.sha256, self.size = digest.hexdigest(), self.asset.size
+        super().save(*args, **kwargs)
+        self._hashed_asset = self.asset.name if self.asset else None
+
     def clean(self):
         """Validate image name format"""
-        if not re.match(r'^[a-zA-Z0-9_-]+$', self.name):
+        if not IMAGE_NAME_RE.match(self.name):
             raise ValidationError({
                 'name': 'Image name can only contain letters, numbers, underscore and hyphen'
             })
@@ -122,53 +218,42 @@ class SessionAnimation(models.Model):
         verbose_name="Time Between Images (ms)",
         help_text="Delay between image changes in milliseconds"
     )
-    image_names = models.CharField(
-        max_length=500,
-        verbose_name="Image Names",
-        help_text="Comma-separated image names (e.g., image1,image2,image3)",
+    images = models.ManyToManyField(
+        Image,
+        through='SessionAnimationImage',
+        related_name='animations',
         blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Session Animation"
         verbose_name_plural = "Session Animations"
 
-    def clean(self):
-        """Validate animation configuration"""
-        errors = {}
-
-        # Parse and validate image names
-        if not self.image_names or not self.image_names.strip():
-            errors['image_names'] = 'At least one image name is required'
-        else:
-            # Split and clean image names
-            names = [name.strip() for name in self.image_names.split(',')]
-            names = [name for name in names if name]  # Remove empty strings
-
-            if not names:
-                errors['image_names'] = 'At least one valid image name is required'
-            else:
-                # Validate each image name format
-                for name in names:
-                    if not re.match(r'^[a-zA-Z0-9_-]+$', name):
-                        errors['image_names'] = f'Invalid image name "{name}". Only letters, numbers, underscore and hyphen allowed'
-                        break
-
-                # Check if all images exist in database
-                if 'image_names' not in errors:
-                    existing_images = set(Image.objects.filter(name__in=names).values_list('name', flat=True))
-                    missing_images = set(names) - existing_images
-                    if missing_images:
-                        errors['image_names'] = f'Images not found in database: {", ".join(sorted(missing_images))}'
-
-        if errors:
-            raise ValidationError(errors)
+    def set_images(self, names):
+        """Replace the ordered image list with the images matching ``names``"""
+        images = Image.objects.in_bulk(names, field_name='name')
+        missing = [name for name in names if name not in images]
+        if missing:
+            raise ValidationError({
+                'images': f'Images not found in database: {", ".join(sorted(set(missing)))}'
+            })
+        with muted_touches():
+            self.animation_images.all().delete()
+        SessionAnimationImage.objects.bulk_create([
+            SessionAnimationImage(animation=self, image=images[name], position=position)
+            for position, name in enumerate(names)
+        ])
+        touch_content_sessions(pk=self.content_session_id)
+        # Drop any stale prefetched list so get_image_list() sees the new order
+        getattr(self, '_prefetched_objects_cache', {}).pop('animation_images', None)
 
     def get_image_list(self):
-        """Return list of cleaned image names"""
-        if not self.image_names:
-            return []
-        return [name.strip() for name in self.image_names.split(',') if name.strip()]
+        """Return ordered list of image names (uses the prefetch cache when available)"""
+        entries = self.animation_images.all()
+        if 'animation_images' not in getattr(self, '_prefetched_objects_cache', {}):
+            entries = entries.select_related('image')
+        return [entry.image.name for entry in entries]
 
     @property
     def image_count(self):
@@ -177,3 +262,67 @@ class SessionAnimation(models.Model):
 
     def __str__(self):
         return f"{self.content_session} - Animation ({self.image_count} images)"
+
+
+class SessionAnimationImage(models.Model):
+    """Ordered entry of an Image within a SessionAnimation"""
+    animation = models.ForeignKey(SessionAnimation, related_name='animation_images', on_delete=models.CASCADE)
+    image = models.ForeignKey(Image, related_name='animation_entries', on_delete=models.PROTECT)
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['position']
+        unique_together = ['animation', 'position']
+
+    def __str__(self):
+        return f"{self.animation} - #{self.position} {self.image.name}"
+
+
+class Device(models.Model):
+    """Last reported state of an LED controller (written in batches, see content.telemetry)"""
+    device_id = models.CharField(max_length=100, unique=True)
+    checksum = models.CharField(max_length=64, blank=True, help_text="Checksum of the content the device is running")
+    uptime = models.PositiveBigIntegerField(default=0, help_text="Seconds since the device booted")
+    error_count = models.PositiveIntegerField(default=0, help_text="Errors reported by the device since boot")
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        ordering = ['device_id']
+
+    def __str__(self):
+        return self.device_id
+
+
+class SessionBlob(models.Model):
+    """A ContentSession subtree stored once under the hash of its content (see content.history)"""
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.hash[:12]
+
+
+class ShowVersion(models.Model):
+    """A recorded state of an LEDContent: its settings plus an ordered list of session blob hashes"""
+    led_content = models.ForeignKey(LEDContent, related_name='versions', on_delete=models.CASCADE)
+    number = models.PositiveIntegerField()
+    hash = models.CharField(max_length=64, help_text="Hash over settings and sessions, equal for identical versions")
+    header = models.JSONField(help_text="Title and daily Frame1/Frame0 window")
+    sessions = models.JSONField(help_text="Ordered [session_order, blob hash] pairs")
+    created_at = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    note = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        ordering = ['led_content', '-number']
+        unique_together = ['led_content', 'number']
+
+    @property
+    def session_hashes(self):
+        return [blob_hash for _, blob_hash in self.sessions]
+
+    def __str__(self):
+        return f"{self.led_content.title} - Version {self.number}"
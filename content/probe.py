@@ -0,0 +1,77 @@
+"""
+Version probe for polling devices.
+
+/api/version and /api/test/version answer "did anything change?" with a few
+bytes: the content version and checksum of the show and its next schedule
+boundary. Both bodies are pre-rendered into one cache entry, so serving a
+probe is a single cache read and no ORM access. The entry is rebuilt when
+a show changes (see VERSION_PROBE_KEY), when the earliest boundary passes,
+and at the latest after LED_VERSION_PROBE_TTL seconds.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import VERSION_PROBE_KEY
+from .schedule import next_boundary, scheduled_shows
+
+
+EMPTY_PROBE = json.dumps({'version': '', 'checksum': '', 'next_boundary': None}, separators=(',', ':')).encode()
+
+
+def render_probe(led_content, now):
+    """Probe body of a show and its next boundary"""
+    if led_content is None:
+        return EMPTY_PROBE, None
+    boundary = next_boundary(led_content, now)
+    body = json.dumps({
+        'version': led_content.version,
+        'checksum': led_content.checksum,
+        'next_boundary': boundary.isoformat() if boundary else None,
+    }, separators=(',', ':')).encode()
+    return body, boundary
+
+
+def build_probes(now=None):
+    """Return the probe cache entry: bodies of the active and test show and when they expire"""
+    now = now or timezone.now()
+    active = test = None
+    for led_content in scheduled_shows().order_by('-created_at'):
+        if led_content.is_active and active is None:
+            active = led_content
+        if led_content.is_test and test is None:
+            test = led_content
+
+    probes = {}
+    boundaries = []
+    for kind, led_content in (('active', active), ('test', test)):
+        probes[kind], boundary = render_probe(led_content, now)
+        if boundary is not None:
+            boundaries.append(boundary.timestamp())
+    probes['expires'] = min(boundaries, default=None)
+    return probes
+
+
+def _is_current(probes):
+    return probes is not None and (probes['expires'] is None or probes['expires'] > timezone.now().timestamp())
+
+
+def get_probe(kind):
+    """Probe body of the 'active' or 'test' show"""
+    probes = cache.get(VERSION_PROBE_KEY)
+    if not _is_current(probes):
+        probes = build_probes()
+        cache.set(VERSION_PROBE_KEY, probes, settings.LED_VERSION_PROBE_TTL)
+    return probes[kind]
+
+
+async def aget_probe(kind):
+    """Async counterpart of get_probe"""
+    probes = await cache.aget(VERSION_PROBE_KEY)
+    if not _is_current(probes):
+        probes = await sync_to_async(build_probes)()
+        await cache.aset(VERSION_PROBE_KEY, probes, settings.LED_VERSION_PROBE_TTL)
+    return probes[kind]
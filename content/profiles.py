@@ -0,0 +1,53 @@
+"""
+Output profiles: gamma correction and brightness limits as lookup tables.
+
+Each profile in LED_OUTPUT_PROFILES is turned into a 256 entry uint8 table
+once per process; rendering maps every color channel through the table
+instead of computing powers per pixel. Shows use the day profile inside
+their Frame1/Frame0 window and the night profile outside of it.
+"""
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+
+@lru_cache(maxsize=None)
+def build_lut(gamma=1.0, brightness=1.0):
+    """Read-only lookup table mapping 0-255 channel values through gamma and brightness"""
+    levels = np.arange(256) / 255
+    lut = np.round(255 * np.power(levels, gamma) * min(max(brightness, 0.0), 1.0)).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def get_lut(profile):
+    try:
+        options = settings.LED_OUTPUT_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f'Unknown output profile: {profile}')
+    return build_lut(**options)
+
+
+def in_daily_window(start, end, moment):
+    """Whether the time of ``moment`` lies in the daily window from start (Frame1) to end (Frame0)"""
+    if start == end:
+        return True
+    current = moment.time()
+    if start is None:
+        return current < end
+    if end is None:
+        return current >= start
+    if start <= end:
+        return start <= current < end
+    # The window runs over midnight
+    return current >= start or current < end
+
+
+def profile_for(led_content, moment=None):
+    """Name of the output profile of a show at ``moment`` (default now)"""
+    moment = timezone.localtime(moment)
+    if in_daily_window(led_content.start_time, led_content.end_time, moment):
+        return settings.LED_DAY_PROFILE
+    return settings.LED_NIGHT_PROFILE
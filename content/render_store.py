@@ -0,0 +1,269 @@
+"""
+Rendered payloads shared by all worker processes of a host.
+
+Every show has one file in LED_SHARED_RENDER_DIR holding its rendered
+payloads (.def text, JSON, frame streams) for a single content version::
+
+    b'LEDR', u8 format version, u64 index offset, u16 length + content version
+    payloads
+    index: u32 entry count, entry count x (u16 length + name, u64 offset, u64 length)
+
+Workers map the file read-only and serve slices of the mapping, so the
+bytes exist once in the page cache instead of once per process. Publishing
+writes a new file next to the old one and swaps it in with os.replace;
+readers notice a new file by its inode on a stat() and remap it, no locks
+involved. Responses still streaming from the old mapping keep it alive
+until they finish.
+
+Concurrent publishers of different entries for the same version can drop
+each other's entries; the loser simply renders its entry again on the next
+miss.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from stat import S_ISDIR, S_IWGRP, S_IWOTH
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import JSONRenderer
+
+from .fragments import aget_session_fragments, aiter_def, def_header, iter_def, iter_def_chunks, iter_def_lines
+from .serializers import LEDContentSerializer
+from .simulator import STREAM_FORMAT_VERSION, encode_frame_stream, get_frame_stream, render_show
+
+
+MAGIC = b'LEDR'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sBQH')
+ENTRY = struct.Struct('<QQ')
+CHUNK_SIZE = 64 * 1024
+
+
+class StoredFile:
+    """A mapped payload file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.stat = _stat_key(os.fstat(f.fileno()))
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, index_offset, version_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f'Not a render store file: {path}')
+        self.version = self.map[HEADER.size:HEADER.size + version_length].decode()
+
+        self.entries = {}
+        (count,) = struct.unpack_from('<I', self.map, index_offset)
+        position = index_offset + 4
+        for _ in range(count):
+            (name_length,) = struct.unpack_from('<H', self.map, position)
+            name = self.map[position + 2:position + 2 + name_length].decode()
+            offset, length = ENTRY.unpack_from(self.map, position + 2 + name_length)
+            self.entries[name] = (offset, length)
+            position += 2 + name_length + ENTRY.size
+
+    def get(self, entry):
+        if entry not in self.entries:
+            return None
+        offset, length = self.entries[entry]
+        return memoryview(self.map)[offset:offset + length]
+
+
+def check_directory(directory):
+    """
+    Refuse a store directory other local users could plant payloads in.
+
+    It has to be a real directory owned by this user and must not be
+    writable by group or others.
+    """
+    info = os.lstat(directory)
+    if not S_ISDIR(info.st_mode):
+        raise ImproperlyConfigured(f'LED_SHARED_RENDER_DIR {directory} is not a directory')
+    if info.st_uid != os.getuid():
+        raise ImproperlyConfigured(f'LED_SHARED_RENDER_DIR {directory} is owned by another user')
+    if info.st_mode & (S_IWGRP | S_IWOTH):
+        raise ImproperlyConfigured(f'LED_SHARED_RENDER_DIR {directory} is writable by other users')
+
+
+def _stat_key(stat):
+    return stat.st_ino, stat.st_dev, stat.st_mtime_ns, stat.st_size
+
+
+class RenderStore:
+    def __init__(self, directory):
+        self.directory = directory
+        self._files = {}
+        self._publish_lock = threading.Lock()
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        check_directory(directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.bin')
+
+    def open(self, name):
+        """Return the current StoredFile of ``name``, remapping it when it was replaced"""
+        path = self.path(name)
+        try:
+            stat = _stat_key(os.stat(path))
+        except FileNotFoundError:
+            return None
+        stored = self._files.get(name)
+        if stored is None or stored.stat != stat:
+            try:
+                stored = StoredFile(path)
+            except (FileNotFoundError, ValueError):
+                return None
+            self._files[name] = stored
+        return stored
+
+    def get(self, name, version, entry):
+        """Return a memoryview of a payload of the given version, or None"""
+        stored = self.open(name)
+        if stored is None or stored.version != version:
+            return None
+        return stored.get(entry)
+
+    def publish(self, name, version, entries):
+        """
+        Atomically replace the payloads of ``name`` and return the new StoredFile.
+
+        ``entries`` maps entry names to bytes or iterables of bytes chunks,
+        which are written without being joined in memory. Entries of the
+        current file are kept when it holds the same version.
+        """
+        current = self.open(name)
+        if current is not None and current.version == version:
+            entries = {**{key: current.get(key) for key in current.entries}, **entries}
+
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{name}.', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                encoded_version = version.encode()
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(encoded_version)) + encoded_version)
+                index = []
+                for key, payload in entries.items():
+                    offset = f.tell()
+                    if isinstance(payload, (bytes, bytearray, memoryview)):
+                        f.write(payload)
+                    else:
+                        for chunk in payload:
+                            f.write(chunk)
+                    index.append((key.encode(), offset, f.tell() - offset))
+
+                index_offset = f.tell()
+                f.write(struct.pack('<I', len(index)))
+                for key, offset, length in index:
+                    f.write(struct.pack('<H', len(key)) + key + ENTRY.pack(offset, length))
+                f.seek(0)
+                f.write(HEADER.pack(MAGIC, FORMAT_VERSION, index_offset, len(encoded_version)))
+            # Mapped before the swap, so it stays readable even if another publisher replaces it right away
+            stored = StoredFile(temp_path)
+            with self._publish_lock:
+                os.replace(temp_path, self.path(name))
+                self._files[name] = stored
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return stored
+
+    def get_or_render(self, name, version, entry, render):
+        """Return a payload, publishing ``render()`` (bytes or chunks) on a miss"""
+        payload = self.get(name, version, entry)
+        if payload is None:
+            payload = self.publish(name, version, {entry: render()}).get(entry)
+        return payload
+
+
+def iter_chunks(payload, chunk_size=CHUNK_SIZE):
+    """Split a payload into chunks for a streaming response"""
+    for start in range(0, len(payload), chunk_size):
+        yield payload[start:start + chunk_size]
+
+
+async def _aiter_chunks(payload, chunk_size=CHUNK_SIZE):
+    """Async counterpart of iter_chunks, ASGI streaming responses need async iterators"""
+    for chunk in iter_chunks(payload, chunk_size):
+        yield chunk
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process wide RenderStore, or None when LED_SHARED_RENDER_DIR is not set"""
+    global _store
+    if _store is None and settings.LED_SHARED_RENDER_DIR:
+        with _store_lock:
+            if _store is None:
+                _store = RenderStore(settings.LED_SHARED_RENDER_DIR)
+    return _store
+
+
+def _show_payload(led_content, entry, render):
+    """Return a show payload from the shared store, or render it when the store is disabled"""
+    store = get_store()
+    if store is None:
+        return render()
+    return store.get_or_render(f'show-{led_content.pk}', led_content.version, entry, render)
+
+
+def show_def(led_content):
+    """The .def text of a show as bytes chunks"""
+    payload = _show_payload(led_content, 'def', lambda: (chunk.encode() for chunk in iter_def(led_content)))
+    return payload if get_store() is None else iter_chunks(payload)
+
+
+def show_json(led_content):
+    """The JSON representation of a show as rendered by the API"""
+    return _show_payload(led_content, 'json', lambda: JSONRenderer().render(LEDContentSerializer(led_content).data))
+
+
+def show_frames(led_content, profile):
+    """The compressed frame stream of a show for an output profile"""
+    if get_store() is None:
+        return get_frame_stream(led_content, profile)
+    width, height = settings.LED_MATRIX_WIDTH, settings.LED_MATRIX_HEIGHT
+    return _show_payload(
+        led_content,
+        f'frames:v{STREAM_FORMAT_VERSION}:{profile}:{width}x{height}',
+        lambda: encode_frame_stream(render_show(led_content, width, height, profile), width, height),
+    )
+
+
+async def _ashow_payload(led_content, entry, render):
+    """Async counterpart of _show_payload, ``render`` is a coroutine function"""
+    store = get_store()
+    if store is None:
+        return await render()
+    name = f'show-{led_content.pk}'
+    payload = store.get(name, led_content.version, entry)
+    if payload is None:
+        stored = await sync_to_async(store.publish)(name, led_content.version, {entry: await render()})
+        payload = stored.get(entry)
+    return payload
+
+
+async def ashow_def(led_content):
+    """Async counterpart of show_def, returns an async iterator of bytes chunks"""
+    if get_store() is None:
+        return (chunk.encode() async for chunk in aiter_def(led_content))
+
+    async def render():
+        fragments = [fragment['def'] for fragment in await aget_session_fragments(led_content)]
+        return (chunk.encode() for chunk in iter_def_chunks(iter_def_lines(def_header(led_content), fragments)))
+
+    return _aiter_chunks(await _ashow_payload(led_content, 'def', render))
+
+
+async def ashow_json(led_content):
+    """Async counterpart of show_json"""
+    async def render():
+        fragments = await aget_session_fragments(led_content)
+        return JSONRenderer().render(LEDContentSerializer.represent(led_content, fragments))
+
+    return await _ashow_payload(led_content, 'json', render)
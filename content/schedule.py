@@ -0,0 +1,188 @@
+"""
+Schedule boundaries and cache warming.
+
+The effective show changes at known instants: when a session window opens
+or closes (on a date, or daily for windows given as times only), and
+daily at Frame1/Frame0. /api/version reports the next one to devices.
+
+Device output does not change at these instants: the .def text, the JSON
+and their session fragments are keyed by content version and carry the
+schedule for the device to apply. Only the output profile of the admin
+frame preview switches at Frame1/Frame0. ScheduleWarmer is a daemon thread
+that wakes shortly before the next boundary of the active and test shows
+and makes sure their device payloads are rendered, so payloads dropped by
+an edit or a restart are not rendered by the first polling devices. The
+frame stream is only rendered ahead with LED_SCHEDULE_WARM_FRAMES, since
+it is large and only the admin preview uses it.
+
+With the default per-process cache the warmer has to run inside the web
+process; it is started by the first device request. With a shared cache
+backend the ``warm_schedule`` management command can run it instead.
+"""
+import bisect
+import logging
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .durations import get_show_duration
+from .fragments import get_session_fragments
+from .models import LEDContent
+from .profiles import profile_for
+from .render_store import get_store, show_def, show_frames, show_json
+
+
+logger = logging.getLogger(__name__)
+
+
+def _end_instant(end):
+    """
+    End times are inclusive, so a window closes one second after its end;
+    None for windows ending on the last representable second, which never close.
+    """
+    end = end.replace(microsecond=0)
+    if end >= datetime.max.replace(microsecond=0):
+        return None
+    return end + timedelta(seconds=1)
+
+
+def session_boundaries(led_content):
+    """
+    Return (dated, daily): the sorted naive local datetimes at which a dated
+    session window of the show opens or closes, and the sorted times of day
+    at which a window given as times only opens or closes.
+
+    Cached per content version. Dated windows follow the validation rules:
+    the time of day only applies together with a date.
+    """
+    key = f"content:schedule:{led_content.version}"
+    boundaries = cache.get(key)
+    if boundaries is None:
+        windows = led_content.sessions.filter(
+            Q(start_date__isnull=False) | Q(end_date__isnull=False)
+            | Q(start_time__isnull=False) | Q(end_time__isnull=False)
+        ).values_list('start_date', 'start_time', 'end_date', 'end_time')
+        dated = set()
+        daily = set()
+        for start_date, start_time, end_date, end_time in windows:
+            if start_date is None and end_date is None:
+                if start_time is not None:
+                    daily.add(start_time.replace(microsecond=0))
+                if end_time is not None:
+                    daily.add(_end_instant(datetime.combine(date.min, end_time)).time())
+                continue
+            if start_date is not None:
+                dated.add(datetime.combine(start_date, start_time or dt_time.min))
+            if end_date is not None:
+                dated.add(_end_instant(datetime.combine(end_date, end_time or dt_time.max)))
+        dated.discard(None)
+        boundaries = sorted(dated), sorted(daily)
+        cache.set(key, boundaries, None)
+    return boundaries
+
+
+def next_boundary(led_content, after=None):
+    """The first schedule boundary of a show after ``after`` (default now) as aware datetime, or None"""
+    after = timezone.localtime(after)
+    naive = after.replace(tzinfo=None)
+    candidates = []
+
+    dated, daily = session_boundaries(led_content)
+    index = bisect.bisect_right(dated, naive)
+    if index < len(dated):
+        candidates.append(dated[index])
+
+    for moment in [*daily, led_content.start_time, led_content.end_time]:
+        if moment is not None:
+            candidate = datetime.combine(naive.date(), moment)
+            if candidate <= naive:
+                candidate += timedelta(days=1)
+            candidates.append(candidate)
+
+    if not candidates:
+        return None
+    return timezone.make_aware(min(candidates), after.tzinfo)
+
+
+def scheduled_shows():
+    """Shows served to devices: the active one and the test one"""
+    return LEDContent.objects.filter(Q(is_active=True) | Q(is_test=True))
+
+
+def warm_show(led_content, moment=None):
+    """
+    Render and cache the device payloads of a show, and with
+    LED_SCHEDULE_WARM_FRAMES its frame stream at ``moment`` (default now)
+    """
+    get_session_fragments(led_content)
+    get_show_duration(led_content)
+    if get_store() is not None:
+        show_def(led_content)
+        show_json(led_content)
+    if settings.LED_SCHEDULE_WARM_FRAMES:
+        show_frames(led_content, profile_for(led_content, moment))
+
+
+class ScheduleWarmer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._worker = None
+        self._warmed = set()
+
+    def ensure_started(self):
+        """Start the warmer thread once per process"""
+        if self._worker is not None or not settings.LED_SCHEDULE_WARMER:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name='schedule-warmer', daemon=True)
+                self._worker.start()
+
+    def step(self, now=None):
+        """
+        Warm the shows whose next boundary is within the lead time.
+
+        Returns the number of seconds until the next step is due.
+        """
+        now = now or timezone.now()
+        lead = timedelta(seconds=settings.LED_SCHEDULE_WARM_LEAD)
+        wait = settings.LED_SCHEDULE_POLL_INTERVAL
+        for led_content in scheduled_shows():
+            boundary = next_boundary(led_content, now)
+            if boundary is None:
+                continue
+            if boundary - now <= lead:
+                key = (led_content.version, boundary)
+                if key not in self._warmed:
+                    warm_show(led_content, boundary)
+                    self._warmed = {k for k in self._warmed if k[1] > now} | {key}
+                    logger.info('Warmed "%s" for the schedule boundary at %s', led_content, boundary)
+                # Check again right after the boundary has passed
+                wait = min(wait, (boundary - now).total_seconds() + 1)
+            else:
+                wait = min(wait, (boundary - now - lead).total_seconds())
+        return max(wait, 1)
+
+    def _run(self):
+        while True:
+            try:
+                wait = self.step()
+            except Exception:
+                logger.exception('Warming the schedule caches failed')
+                wait = settings.LED_SCHEDULE_POLL_INTERVAL
+            finally:
+                connections.close_all()
+            time.sleep(wait)
+
+    def run_forever(self):
+        """Run in the calling thread, see the warm_schedule command"""
+        self._run()
+
+
+warmer = ScheduleWarmer()
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .fragments import get_session_fragments
 from .models import LEDContent, ContentSession, SessionText, SessionLine, SessionAnimation
 
 
@@ -39,11 +40,12 @@ class SessionAnimationSerializer(serializers.ModelSerializer):
         return obj.get_image_list()
 
     def to_representation(self, instance):
+        images = self.get_images(instance)
         return {
             'loopCount': instance.loop_count,
             'timeBetweenImages': instance.time_between_images,
-            'imageCount': instance.image_count,
-            'images': self.get_images(instance)
+            'imageCount': len(images),
+            'images': images
         }
 
 
@@ -65,7 +67,25 @@ class LEDContentSerializer(serializers.ModelSerializer):
         fields = ['sessions', 'checksum']
     
     def to_representation(self, instance):
+        return self.represent(instance, get_session_fragments(instance))
+
+    @staticmethod
+    def represent(instance, fragments):
+        """Representation of a show from its already loaded session fragments"""
         return {
-            'sessions': [session for session in ContentSessionSerializer(instance.sessions.all(), many=True).data],
+            'sessions': [fragment['json'] for fragment in fragments],
             'checksum': instance.checksum
-        }
\ No newline at end of file
+        }
+
+
+class LEDContentCloneSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200, required=False)
+    date_offset_days = serializers.IntegerField(required=False, default=0, min_value=-36500, max_value=36500)
+
+
+class DeviceReportSerializer(serializers.Serializer):
+    device_id = serializers.CharField(max_length=100)
+    # The content version from /api/version, or the checksum of the show
+    checksum = serializers.CharField(max_length=64, required=False, allow_blank=True, default='')
+    uptime = serializers.IntegerField(min_value=0, max_value=2**63 - 1, required=False, default=0)
+    error_count = serializers.IntegerField(min_value=0, max_value=2**31 - 1, required=False, default=0)
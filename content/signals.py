@@ -0,0 +1,44 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    LEDContent, ContentSession, SessionText, SessionLine, Image, SessionAnimation, SessionAnimationImage,
+    VERSION_PROBE_KEY, _touches_muted, touch_content_sessions, touch_led_content,
+)
+
+
+@receiver([post_save, post_delete], sender=LEDContent)
+def show_changed(sender, instance, **kwargs):
+    # Saving a show may also change which shows are active and test
+    cache.delete(VERSION_PROBE_KEY)
+
+
+@receiver([post_save, post_delete], sender=ContentSession)
+def session_changed(sender, instance, **kwargs):
+    if _touches_muted.get():
+        return
+    touch_led_content(pk=instance.led_content_id)
+
+
+@receiver([post_save, post_delete], sender=SessionText)
+@receiver([post_save, post_delete], sender=SessionLine)
+@receiver([post_save, post_delete], sender=SessionAnimation)
+def session_part_changed(sender, instance, **kwargs):
+    if _touches_muted.get():
+        return
+    touch_content_sessions(pk=instance.content_session_id)
+
+
+@receiver([post_save, post_delete], sender=SessionAnimationImage)
+def animation_image_changed(sender, instance, **kwargs):
+    if _touches_muted.get():
+        return
+    touch_content_sessions(animation__id=instance.animation_id)
+
+
+@receiver(post_save, sender=Image)
+def image_changed(sender, instance, created, **kwargs):
+    # Renaming an image or replacing its asset changes every show that references it
+    if not created:
+        touch_content_sessions(animation__images=instance)
@@ -0,0 +1,200 @@
+"""
+Software simulation of the LED matrix.
+
+Renders a show into frames (H x W x 3 uint8 arrays) so it can be previewed
+without the hardware. Lines are drawn as vertical columns at their
+start_index, text is drawn with the 5x7 bitmap font from its start_index
+and scrolls one pixel per session ``delay`` when it does not fit, and
+animations step through their images every ``time_between_images``.
+Animation images only exist in the device firmware, so each image is shown
+as a dimmed placeholder color derived from its name. All colors are mapped
+through the lookup table of an output profile (see content.profiles).
+
+Once the text has stopped scrolling an animation only repeats its images,
+so those loops are rendered once and repeated through the run table; the
+number of frames does not grow with ``loop_count``.
+
+The frame stream format served to the admin preview is a zlib compressed
+little-endian blob::
+
+    b'LEDF', u8 format version, u16 width, u16 height, u32 run count, u32 frame count
+    run count x (u32 session order, u32 first frame, u32 frame count, u32 duration in ms, u32 repeat)
+    frame count x height x width x 3 bytes of RGB data
+
+A run shows its frames in order, each for the run's duration, and plays
+them ``repeat`` times before moving on to the next run.
+"""
+import hashlib
+import struct
+import zlib
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .font import GLYPH_HEIGHT, render_text
+from .profiles import get_lut, profile_for
+
+
+STREAM_MAGIC = b'LEDF'
+STREAM_FORMAT_VERSION = 2
+STREAM_HEADER = struct.Struct('<4sBHHII')
+RUN_DTYPE = np.dtype([('frame', '<u4'), ('count', '<u4'), ('duration', '<u4'), ('repeat', '<u4')])
+RUN_TABLE_DTYPE = np.dtype([('session_order', '<u4')] + RUN_DTYPE.descr)
+
+PLACEHOLDER_BRIGHTNESS = 0.25
+
+
+class SessionFrames(NamedTuple):
+    session_order: int
+    frames: np.ndarray  # (N, H, W, 3) uint8
+    runs: np.ndarray  # RUN_DTYPE, frame indexes into ``frames``
+
+    @property
+    def duration(self):
+        return sum(count * duration * repeat for _, count, duration, repeat in self.runs.tolist())
+
+
+def placeholder_color(image_name):
+    """Stable dimmed color standing in for a firmware image"""
+    digest = hashlib.md5(image_name.encode()).digest()
+    return np.frombuffer(digest[:3], dtype=np.uint8) * PLACEHOLDER_BRIGHTNESS
+
+
+def render_session(session, text=None, width=None, height=None, lut=None):
+    """
+    Render one loaded session into frames.
+
+    ``text`` is the SessionText to draw, which for sessions without their
+    own text is the text repeated from a previous session. ``lut`` is the
+    output profile lookup table applied to every color.
+    """
+    width = width or settings.LED_MATRIX_WIDTH
+    height = height or settings.LED_MATRIX_HEIGHT
+    if lut is None:
+        lut = get_lut(settings.LED_DAY_PROFILE)
+    delay = max(session.delay, 1)
+
+    # Text: one frame per scroll step
+    bitmap = render_text(text.content if text is not None else '')[:height]
+    text_x = min(text.start_index, width) if text is not None else width
+    visible = width - text_x
+    scroll_steps = max(bitmap.shape[1] - visible, 0)
+    text_duration = (scroll_steps + 1) * delay
+
+    # Animation: one step per image and loop
+    animation = getattr(session, 'animation', None)
+    image_names = animation.get_image_list() if animation is not None else []
+    interval = max(animation.time_between_images, 1) if animation is not None else 1
+    image_steps = len(image_names) * animation.loop_count if image_names else 0
+    animation_duration = image_steps * interval
+
+    # Image steps from tail_step on start after the text stopped scrolling
+    tail_step = -(-text_duration // interval) if image_names else 0
+    tail_steps = max(image_steps - tail_step, 0)
+    head_end = tail_step * interval if tail_steps else max(text_duration, animation_duration)
+
+    # Head: one frame per scroll or image step while the text scrolls
+    starts = np.union1d(np.arange(scroll_steps + 1) * delay, np.arange(min(image_steps, tail_step)) * interval)
+    starts = starts[starts < head_end]
+    runs = np.zeros(len(starts), dtype=RUN_DTYPE)
+    runs['frame'] = np.arange(len(starts))
+    runs['count'] = 1
+    runs['duration'] = np.diff(np.append(starts, head_end))
+    runs['repeat'] = 1
+
+    if tail_steps:
+        # Tail: one loop of images, repeated
+        loop = min(len(image_names), tail_steps)
+        repeat, rest = divmod(tail_steps, loop)
+        tail = [(len(starts), loop, interval, repeat)] + ([(len(starts), rest, interval, 1)] if rest else [])
+        runs = np.concatenate([runs, np.array(tail, dtype=RUN_DTYPE)])
+        starts = np.append(starts, (tail_step + np.arange(loop)) * interval)
+
+    frames = np.zeros((len(starts), height, width, 3), dtype=np.uint8)
+
+    if image_names:
+        backgrounds = lut[np.array([placeholder_color(name) for name in image_names], dtype=np.uint8)]
+        image_index = np.minimum(starts // interval, image_steps - 1) % len(image_names)
+        frames[:] = backgrounds[image_index][:, None, None, :]
+
+    for line in session.lines.all():
+        if line.start_index < width:
+            frames[:, :, line.start_index] = lut[list(line.color_rgb)]
+
+    if visible > 0 and bitmap.shape[1]:
+        offsets = np.minimum(starts // delay, scroll_steps)
+        padded = np.pad(bitmap, ((0, 0), (0, visible)))
+        # (frames, rows, visible columns) window of the text strip per scroll offset
+        mask = padded[:, offsets[:, None] + np.arange(visible)].transpose(1, 0, 2)
+        top = max((height - GLYPH_HEIGHT) // 2, 0)
+        region = frames[:, top:top + mask.shape[1], text_x:]
+        region[mask] = lut[list(text.color_rgb)]
+
+    return SessionFrames(session.session_order, frames, runs)
+
+
+def render_show(led_content, width=None, height=None, profile=None):
+    """
+    Render every session of a show, repeating text the way the device does.
+
+    ``profile`` names the output profile, by default the one of the show's
+    current Frame1/Frame0 state.
+    """
+    lut = get_lut(profile or profile_for(led_content))
+    rendered = []
+    last_text = None
+    for session in led_content.sessions.with_related().order_by('session_order'):
+        text = getattr(session, 'text', None)
+        if text is not None:
+            last_text = text
+        rendered.append(render_session(session, last_text, width, height, lut))
+    return rendered
+
+
+def encode_frame_stream(rendered, width, height):
+    """Pack rendered sessions into the compressed frame stream format"""
+    table = np.zeros(sum(len(session.runs) for session in rendered), dtype=RUN_TABLE_DTYPE)
+    position = first_frame = 0
+    for session in rendered:
+        runs = table[position:position + len(session.runs)]
+        runs['session_order'] = session.session_order
+        for field in RUN_DTYPE.names:
+            runs[field] = session.runs[field]
+        runs['frame'] += first_frame
+        position += len(session.runs)
+        first_frame += len(session.frames)
+
+    compressor = zlib.compressobj(6)
+    chunks = [
+        compressor.compress(STREAM_HEADER.pack(STREAM_MAGIC, STREAM_FORMAT_VERSION, width, height, len(table), first_frame)),
+        compressor.compress(table.tobytes()),
+    ]
+    chunks.extend(compressor.compress(session.frames.tobytes()) for session in rendered)
+    chunks.append(compressor.flush())
+    return b''.join(chunks)
+
+
+def decode_frame_stream(data):
+    """Inverse of encode_frame_stream, returns (run table, frames)"""
+    raw = zlib.decompress(data)
+    magic, version, width, height, run_count, frame_count = STREAM_HEADER.unpack_from(raw)
+    if magic != STREAM_MAGIC or version != STREAM_FORMAT_VERSION:
+        raise ValueError('Not a LED frame stream')
+    table = np.frombuffer(raw, dtype=RUN_TABLE_DTYPE, count=run_count, offset=STREAM_HEADER.size)
+    offset = STREAM_HEADER.size + table.nbytes
+    frames = np.frombuffer(raw, dtype=np.uint8, offset=offset).reshape(frame_count, height, width, 3)
+    return table, frames
+
+
+def get_frame_stream(led_content, profile=None):
+    """Return the compressed frame stream of a show, cached per content version and output profile"""
+    width, height = settings.LED_MATRIX_WIDTH, settings.LED_MATRIX_HEIGHT
+    profile = profile or profile_for(led_content)
+    key = f"content:frames:v{STREAM_FORMAT_VERSION}:{led_content.version}:{width}x{height}:{profile}"
+    stream = cache.get(key)
+    if stream is None:
+        stream = encode_frame_stream(render_show(led_content, width, height, profile), width, height)
+        cache.set(key, stream, None)
+    return stream
@@ -0,0 +1,91 @@
+"""
+Buffered device telemetry.
+
+Heartbeats are collected in memory, keeping only the latest report per
+device, and written to the Device table with a single bulk upsert every
+LED_TELEMETRY_FLUSH_INTERVAL seconds or once LED_TELEMETRY_BUFFER_SIZE
+devices are waiting. Thousands of reports per minute therefore turn into a
+handful of write transactions.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+from .models import Device
+
+
+logger = logging.getLogger(__name__)
+
+UPSERT_FIELDS = ['checksum', 'uptime', 'error_count', 'ip_address', 'last_seen']
+
+
+class TelemetryBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reports = {}
+        self._last_flush = time.monotonic()
+        self._worker = None
+
+    def add(self, device_id, **fields):
+        """Queue a report, replacing any pending report of the same device"""
+        with self._lock:
+            self._reports[device_id] = Device(device_id=device_id, **fields)
+            due = (
+                len(self._reports) >= settings.LED_TELEMETRY_BUFFER_SIZE
+                or time.monotonic() - self._last_flush >= settings.LED_TELEMETRY_FLUSH_INTERVAL
+            )
+            if self._worker is None:
+                self._start_worker()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all pending reports in one upsert, returns the number of devices written"""
+        with self._flush_lock:
+            with self._lock:
+                reports, self._reports = self._reports, {}
+                self._last_flush = time.monotonic()
+            if not reports:
+                return 0
+            try:
+                Device.objects.bulk_create(
+                    reports.values(),
+                    update_conflicts=True,
+                    unique_fields=['device_id'],
+                    update_fields=UPSERT_FIELDS,
+                    batch_size=500,
+                )
+            except Exception:
+                logger.exception('Writing %d device reports failed, keeping them for the next flush', len(reports))
+                with self._lock:
+                    # Reports that arrived in the meantime are newer
+                    self._reports = {**reports, **self._reports}
+                return 0
+            return len(reports)
+
+    def pending(self):
+        with self._lock:
+            return len(self._reports)
+
+    def _start_worker(self):
+        self._worker = threading.Thread(target=self._run, name='telemetry-flush', daemon=True)
+        self._worker.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(settings.LED_TELEMETRY_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing device telemetry failed')
+            finally:
+                connections.close_all()
+
+
+buffer = TelemetryBuffer()
@@ -1,3 +1,302 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import date, time
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+
+from . import render_store
+from .async_views import AsyncLEDContentAPIView, AsyncLEDContentDefTestView, AsyncLEDContentDefView
+from .models import Image, LEDContent, ContentSession, SessionAnimation, SessionLine, SessionText
+from .serializers import ContentSessionSerializer
+
+
+def reference_def(led_content):
+    """The .def rendering as originally implemented in LEDContentDefView, query by query"""
+    lines = []
+    if led_content.start_time:
+        lines.append(f'Frame1={led_content.start_time.strftime("%H:%M")}')
+    if led_content.end_time:
+        lines.append(f'Frame0={led_content.end_time.strftime("%H:%M")}')
+
+    sessions = led_content.sessions.all().order_by('session_order')
+    last_text = None
+    for i, session in enumerate(sessions):
+        start_parts = []
+        if session.start_date:
+            start_parts.append(session.start_date.strftime('%Y-%m-%d'))
+        if session.start_time:
+            start_parts.append(session.start_time.strftime('%H:%M'))
+        if start_parts:
+            lines.append(f'Start={" ".join(start_parts)}')
+
+        end_parts = []
+        if session.end_date:
+            end_parts.append(session.end_date.strftime('%Y-%m-%d'))
+        if session.end_time:
+            end_parts.append(session.end_time.strftime('%H:%M'))
+        if end_parts:
+            lines.append(f'End={" ".join(end_parts)}')
+
+        has_text = hasattr(session, 'text') and session.text
+        has_animation = hasattr(session, 'animation') and session.animation
+
+        for line in session.lines.all().order_by('start_index'):
+            r, g, b = line.color_rgb
+            lines.append(f'Line={line.start_index},{r},{g},{b}')
+
+        if has_text:
+            text = session.text
+            lines.append(f'Text={text.start_index},{text.content}')
+            r, g, b = text.color_rgb
+            lines.append(f'Color={r},{g},{b}')
+            last_text = text
+        elif has_animation and last_text is None:
+            lines.append('Text=')
+
+        if has_animation:
+            anim = session.animation
+            image_list = anim.get_image_list()
+            animation_parts = [str(anim.loop_count), str(anim.time_between_images), str(len(image_list))] + image_list
+            lines.append(f'Animation={",".join(animation_parts)}')
+
+        lines.append(f'Delay={session.delay}')
+        if i < len(sessions) - 1:
+            lines.append('Next')
+
+    return '\n'.join(lines)
+
+
+def reference_json(led_content):
+    """The JSON representation as originally serialized, one session at a time"""
+    sessions = ContentSessionSerializer(led_content.sessions.order_by('session_order'), many=True).data
+    return {'sessions': json.loads(json.dumps(sessions)), 'checksum': led_content.checksum}
+
+
+def body(response):
+    return b''.join(response.streaming_content) if response.streaming else response.content
+
+
+async def abody(response):
+    if not response.streaming:
+        return response.content
+    if response.is_async:
+        return b''.join([chunk async for chunk in response.streaming_content])
+    return b''.join(response.streaming_content)
+
+
+@override_settings(LED_SCHEDULE_WARMER=False, LED_SHARED_RENDER_DIR=None)
+class DeviceOutputTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('editor')
+        for name in ['sun', 'moon', 'star']:
+            Image.objects.create(name=name)
+        self.show = LEDContent.objects.create(
+            title='Show', created_by=self.user, start_time=time(8, 0), end_time=time(22, 30), checksum='abc'
+        )
+        self.test_show = LEDContent.objects.create(title='Test', created_by=self.user, is_active=False, is_test=True)
+
+        # Text with lines and a dated window
+        first = self.add_session(self.show, 1, delay=120, start_date=date(2025, 6, 1), start_time=time(9, 0),
+                                 end_date=date(2025, 6, 30))
+        SessionText.objects.create(content_session=first, start_index=3, content='Hallo Welt', color=0xff0000)
+        SessionLine.objects.create(content_session=first, start_index=9, color=0x0000ff)
+        SessionLine.objects.create(content_session=first, start_index=2, color=0x00ff00)
+        # Animation repeating the previous text, with a daily window
+        second = self.add_session(self.show, 2, start_time=time(12, 0), end_time=time(13, 0))
+        self.add_animation(second, ['sun', 'moon', 'sun'])
+        # Lines only
+        third = self.add_session(self.show, 3, delay=50)
+        SessionLine.objects.create(content_session=third, start_index=0, color=0x123456)
+        # Text and animation
+        fourth = self.add_session(self.show, 4)
+        SessionText.objects.create(content_session=fourth, start_index=0, content='Tschüss', color=0x12ab34)
+        self.add_animation(fourth, ['star'], loop_count=3)
+
+        # Animation before any text needs an empty Text=
+        self.add_animation(self.add_session(self.test_show, 1), ['moon'])
+        SessionText.objects.create(
+            content_session=self.add_session(self.test_show, 2), start_index=1, content='Später'
+        )
+        self.add_animation(self.add_session(self.test_show, 3), ['sun', 'star'])
+
+    def add_session(self, led_content, order, **fields):
+        return ContentSession.objects.create(led_content=led_content, session_order=order, **fields)
+
+    def add_animation(self, session, names, **fields):
+        animation = SessionAnimation.objects.create(content_session=session, **fields)
+        animation.set_images(names)
+        return animation
+
+    def refresh(self):
+        self.show.refresh_from_db()
+        self.test_show.refresh_from_db()
+
+    def assertServed(self):
+        """The device endpoints serve exactly what the original rendering produces"""
+        self.refresh()
+        self.assertEqual(body(self.client.get('/api/content.txt')).decode(), reference_def(self.show))
+        self.assertEqual(body(self.client.get('/api/test.txt')).decode(), reference_def(self.test_show))
+        self.assertEqual(json.loads(body(self.client.get('/api/content/'))), reference_json(self.show))
+
+
+class DefOutputTests(DeviceOutputTestCase):
+    def test_matches_reference(self):
+        self.assertServed()
+        # Served again from the fragment cache
+        self.assertServed()
+
+    def test_text_repetition(self):
+        lines = body(self.client.get('/api/content.txt')).decode().split('\n')
+        # The animation of session 2 repeats "Hallo Welt", so it has no Text= of its own
+        second = lines[lines.index('Next') + 1:]
+        self.assertEqual(second[:3], ['Start=12:00', 'End=13:00', 'Animation=1,100,3,sun,moon,sun'])
+
+        test_lines = body(self.client.get('/api/test.txt')).decode().split('\n')
+        self.assertEqual(test_lines[:2], ['Text=', 'Animation=1,100,1,moon'])
+        self.assertEqual(test_lines.count('Next'), 2)
+        self.assertNotEqual(test_lines[-1], 'Next')
+
+    @override_settings(LED_DEF_STREAM_CHUNK_SIZE=1)
+    def test_chunked_stream_matches_reference(self):
+        # Every session in its own chunk, text repetition has to carry over chunk boundaries
+        self.assertServed()
+
+    def test_empty_show(self):
+        empty = LEDContent.objects.create(title='Empty', created_by=self.user)
+        self.assertEqual(body(self.client.get('/api/content.txt')), b'')
+        self.assertEqual(json.loads(body(self.client.get('/api/content/'))), reference_json(empty))
+
+    def test_async_views_match_sync_views(self):
+        factory = AsyncRequestFactory()
+        for view, url in [
+            (AsyncLEDContentDefView, '/api/content.txt'),
+            (AsyncLEDContentDefTestView, '/api/test.txt'),
+            (AsyncLEDContentAPIView, '/api/content/'),
+        ]:
+            response = async_to_sync(view.as_view())(factory.get(url))
+            self.assertEqual(async_to_sync(abody)(response), body(self.client.get(url)), url)
+
+
+class SharedRenderStoreTests(DeviceOutputTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(LED_SHARED_RENDER_DIR=f'{directory}/render')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        render_store._store = None
+        self.addCleanup(setattr, render_store, '_store', None)
+
+    def test_matches_reference(self):
+        self.assertServed()
+        # Served from the mapped files
+        cache.clear()
+        self.assertServed()
+
+    def test_new_version_replaces_stored_payloads(self):
+        self.assertServed()
+        SessionText.objects.filter(content='Hallo Welt').update(content='Neu')
+        ContentSession.objects.filter(session_order=1, led_content=self.show).first().save()
+        self.assertServed()
+
+    def test_publish_round_trip(self):
+        store = render_store.get_store()
+        store.publish('show-x', '1-1', {'def': b'abc', 'json': iter([b'{', b'}'])})
+        self.assertEqual(bytes(store.get('show-x', '1-1', 'def')), b'abc')
+        self.assertEqual(bytes(store.get('show-x', '1-1', 'json')), b'{}')
+        self.assertIsNone(store.get('show-x', '1-2', 'def'))
+        # Entries of the same version are kept when publishing more
+        store.publish('show-x', '1-1', {'frames': b'xyz'})
+        self.assertEqual(bytes(store.get('show-x', '1-1', 'def')), b'abc')
+
+
+class CacheInvalidationTests(DeviceOutputTestCase):
+    """Every edit has to reach the devices although the previous output is cached"""
+
+    def setUp(self):
+        super().setUp()
+        self.assertServed()
+
+    def test_edit_text(self):
+        text = SessionText.objects.get(content='Hallo Welt')
+        text.content = 'Guten Tag'
+        text.color = 0x00ffff
+        text.save()
+        self.assertServed()
+
+    def test_delete_text_changes_repetition(self):
+        # Without the first text the animation of session 2 needs an empty Text=
+        SessionText.objects.get(content='Hallo Welt').delete()
+        self.assertServed()
+        self.assertIn('Text=', body(self.client.get('/api/content.txt')).decode().split('\n'))
+
+    def test_add_text(self):
+        session = ContentSession.objects.get(led_content=self.show, session_order=3)
+        SessionText.objects.create(content_session=session, start_index=5, content='Neu')
+        self.assertServed()
+
+    def test_edit_and_delete_line(self):
+        line = SessionLine.objects.get(start_index=9)
+        line.color = 0xffffff
+        line.save()
+        self.assertServed()
+        SessionLine.objects.get(start_index=2).delete()
+        self.assertServed()
+
+    def test_delete_session(self):
+        ContentSession.objects.get(led_content=self.show, session_order=4).delete()
+        self.assertServed()
+        ContentSession.objects.get(led_content=self.show, session_order=1).delete()
+        self.assertServed()
+
+    def test_edit_session(self):
+        session = ContentSession.objects.get(led_content=self.show, session_order=3)
+        session.delay = 999
+        session.end_date = date(2026, 1, 1)
+        session.save()
+        self.assertServed()
+
+    def test_rename_image(self):
+        image = Image.objects.get(name='sun')
+        image.name = 'sunrise'
+        image.save()
+        self.assertServed()
+        self.assertIn('Animation=1,100,3,sunrise,moon,sunrise', body(self.client.get('/api/content.txt')).decode())
+
+    def test_replace_animation_images(self):
+        ContentSession.objects.get(led_content=self.show, session_order=2).animation.set_images(['star', 'moon'])
+        self.assertServed()
+
+    def test_edit_and_delete_animation(self):
+        animation = ContentSession.objects.get(led_content=self.show, session_order=4).animation
+        animation.loop_count = 7
+        animation.save()
+        self.assertServed()
+        animation.delete()
+        self.assertServed()
+
+    def test_edit_show_settings(self):
+        self.show.start_time = time(6, 15)
+        self.show.end_time = None
+        self.show.save()
+        self.assertServed()
+
+    def test_switch_active_show(self):
+        other = LEDContent.objects.create(title='Other', created_by=self.user)
+        self.add_session(other, 1, delay=1)
+        self.show = other
+        self.assertServed()
+
+    def test_version_probe_follows_edits(self):
+        probe = json.loads(self.client.get('/api/version').content)
+        self.assertEqual(probe['version'], self.show.version)
+        SessionText.objects.filter(content='Hallo Welt').get().save()
+        self.show.refresh_from_db()
+        probe = json.loads(self.client.get('/api/version').content)
+        self.assertEqual(probe['version'], self.show.version)
@@ -1,8 +1,34 @@
-from django.urls import path
-from .views import LEDContentAPIView, LEDContentDefView, LEDContentDefTestView
+from django.conf import settings
+from django.urls import path, re_path
+from .views import (
+    LEDContentAPIView, LEDContentDefView, LEDContentDefTestView, LEDContentCloneView,
+    LEDContentFramesView, DeviceTelemetryView, PollAnalyticsView,
+    ImageBundleView, ImageBundleManifestView, ImageBundleManifestTestView, VersionProbeView, VersionProbeTestView,
+)
+from .async_views import (
+    AsyncLEDContentAPIView, AsyncLEDContentDefView, AsyncLEDContentDefTestView,
+    AsyncVersionProbeView, AsyncVersionProbeTestView,
+)
+
+# Device endpoints are served by the async views under ASGI (see ledmatrix/asgi.py)
+if settings.LED_ASYNC_VIEWS:
+    content_view, def_view, def_test_view = AsyncLEDContentAPIView, AsyncLEDContentDefView, AsyncLEDContentDefTestView
+    version_view, version_test_view = AsyncVersionProbeView, AsyncVersionProbeTestView
+else:
+    content_view, def_view, def_test_view = LEDContentAPIView, LEDContentDefView, LEDContentDefTestView
+    version_view, version_test_view = VersionProbeView, VersionProbeTestView
 
 urlpatterns = [
-    path('api/content/', LEDContentAPIView.as_view(), name='led-content-api'),
-    path('api/content.txt', LEDContentDefView.as_view(), name='led-content-def'),
-    path('api/test.txt', LEDContentDefTestView.as_view(), name='led-content-def-test'),
+    path('api/content/', content_view.as_view(), name='led-content-api'),
+    path('api/content.txt', def_view.as_view(), name='led-content-def'),
+    path('api/test.txt', def_test_view.as_view(), name='led-content-def-test'),
+    path('api/version', version_view.as_view(), name='version-probe'),
+    path('api/test/version', version_test_view.as_view(), name='version-probe-test'),
+    path('api/content/<int:pk>/clone/', LEDContentCloneView.as_view(), name='led-content-clone'),
+    path('api/content/<int:pk>/frames/', LEDContentFramesView.as_view(), name='led-content-frames'),
+    path('api/content/bundle/', ImageBundleManifestView.as_view(), name='image-bundle-manifest'),
+    path('api/test/bundle/', ImageBundleManifestTestView.as_view(), name='image-bundle-manifest-test'),
+    re_path(r'^api/bundles/(?P<bundle_hash>[0-9a-f]{64})\.ledb$', ImageBundleView.as_view(), name='image-bundle'),
+    path('api/telemetry/', DeviceTelemetryView.as_view(), name='device-telemetry'),
+    path('api/analytics/polls/', PollAnalyticsView.as_view(), name='poll-analytics'),
 ]
\ No newline at end of file
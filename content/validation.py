@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+from datetime import date, datetime, time
+
+from django.conf import settings
+
+from .models import IMAGE_NAME_RE
+
+
+ERROR = 'error'
+WARNING = 'warning'
+
+
+@dataclass(frozen=True)
+class ShowIssue:
+    """A single problem found while validating a show"""
+    level: str
+    message: str
+    session_order: int | None = None
+
+    def __str__(self):
+        where = f"Session {self.session_order}: " if self.session_order is not None else ""
+        return f"[{self.level}] {where}{self.message}"
+
+
+def validate_show(led_content):
+    """Validate a whole LEDContent in a fixed number of queries"""
+    sessions = led_content.sessions.with_related().order_by('session_order')
+    return validate_sessions(sessions)
+
+
+def validate_sessions(sessions):
+    """Validate already loaded sessions (see ContentSession.objects.with_related)"""
+    issues = []
+    windows = []
+
+    for session in sessions:
+        issues.extend(_check_lines(session))
+        issues.extend(_check_text(session))
+        issues.extend(_check_animation(session))
+
+        window = _schedule_window(session)
+        if window is not None:
+            start, end = window
+            if start > end:
+                issues.append(ShowIssue(ERROR, 'Schedule window ends before it starts', session.session_order))
+            else:
+                windows.append((start, end, session.session_order))
+
+    issues.extend(_check_overlaps(windows))
+    return issues
+
+
+def _check_lines(session):
+    lines = session.lines.all()
+    if len(lines) > settings.LED_MATRIX_MAX_LINES:
+        yield ShowIssue(
+            ERROR,
+            f'{len(lines)} lines configured, at most {settings.LED_MATRIX_MAX_LINES} are supported',
+            session.session_order
+        )
+
+    seen = set()
+    for line in lines:
+        if line.start_index in seen:
+            yield ShowIssue(ERROR, f'Duplicate line start index {line.start_index}', session.session_order)
+        seen.add(line.start_index)
+        if line.start_index >= settings.LED_MATRIX_WIDTH:
+            yield ShowIssue(
+                ERROR,
+                f'Line start index {line.start_index} is outside the matrix width ({settings.LED_MATRIX_WIDTH})',
+                session.session_order
+            )
+
+
+def _check_text(session):
+    text = getattr(session, 'text', None)
+    if text is None:
+        return
+    if text.start_index >= settings.LED_MATRIX_WIDTH:
+        yield ShowIssue(
+            ERROR,
+            f'Text start index {text.start_index} is outside the matrix width ({settings.LED_MATRIX_WIDTH})',
+            session.session_order
+        )
+    if len(text.content) > settings.LED_MATRIX_MAX_TEXT_LENGTH:
+        yield ShowIssue(
+            ERROR,
+            f'Text is {len(text.content)} characters long, at most {settings.LED_MATRIX_MAX_TEXT_LENGTH} are supported',
+            session.session_order
+        )
+    if '\n' in text.content or '\r' in text.content:
+        yield ShowIssue(ERROR, 'Text must not contain line breaks', session.session_order)
+
+
+def _check_animation(session):
+    animation = getattr(session, 'animation', None)
+    if animation is None:
+        return
+    names = animation.get_image_list()
+    if not names:
+        yield ShowIssue(ERROR, 'Animation has no images', session.session_order)
+    invalid = sorted({name for name in names if not IMAGE_NAME_RE.match(name)})
+    if invalid:
+        yield ShowIssue(ERROR, f'Invalid image names: {", ".join(invalid)}', session.session_order)
+
+
+def _schedule_window(session):
+    """Return the absolute (start, end) datetimes of a dated session, or None"""
+    if session.start_date is None and session.end_date is None:
+        return None
+    start = datetime.combine(session.start_date or date.min, session.start_time or time.min)
+    end = datetime.combine(session.end_date or date.max, session.end_time or time.max)
+    return start, end
+
+
+def _check_overlaps(windows):
+    """Report overlapping schedule windows with a single sweep over the sorted windows"""
+    windows.sort()
+    latest_end = None
+    latest_order = None
+    for start, end, session_order in windows:
+        if latest_end is not None and start < latest_end:
+            yield ShowIssue(
+                WARNING,
+                f'Schedule window overlaps the window of session {latest_order}',
+                session_order
+            )
+        if latest_end is None or end > latest_end:
+            latest_end, latest_order = end, session_order
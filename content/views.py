@@ -1,8 +1,34 @@
-from rest_framework import generics
+import os
+import re
+from datetime import timedelta
+
+from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+from django.utils import timezone
+from .bundles import bundle_path, get_bundle_manifest
+from .cloning import clone_show
+from .fragments import render_def
 from .models import LEDContent
-from .serializers import LEDContentSerializer
+from .probe import get_probe
+from .profiles import profile_for
+from .render_store import show_def, show_frames, show_json
+from .schedule import warmer
+from .serializers import LEDContentSerializer, LEDContentCloneSerializer, DeviceReportSerializer
+from . import telemetry
+from .analytics import content_polls
+
+
+def client_ip(request):
+    # nginx passes the device address in X-Real-IP
+    return request.META.get('HTTP_X_REAL_IP') or request.META.get('REMOTE_ADDR') or ''
 
 
 class LEDContentAPIView(generics.RetrieveAPIView):
@@ -14,111 +40,234 @@ class LEDContentAPIView(generics.RetrieveAPIView):
         return LEDContent.objects.filter(is_active=True).order_by('-created_at').first()
     
     def get(self, request, *args, **kwargs):
+        warmer.ensure_started()
         instance = self.get_object()
         if instance is None:
             return Response({'sessions': [], 'checksum': ''})
         
+        if type(request.accepted_renderer) is JSONRenderer and 'indent' not in request.accepted_media_type:
+            # Plain JSON is served as pre-rendered bytes shared by all workers
+            return HttpResponse(show_json(instance), content_type='application/json')
+
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
 class LEDContentDefView(generics.GenericAPIView):
     queryset = LEDContent.objects.filter(is_active=True)
+    poll_analytics = content_polls
     
     def get_object(self):
         # Return the most recent active LED content
         return LEDContent.objects.filter(is_active=True).order_by('-created_at').first()
     
     def get(self, request, *args, **kwargs):
+        warmer.ensure_started()
         instance = self.get_object()
+        if self.poll_analytics is not None:
+            self.poll_analytics.record(client_ip(request), instance.version if instance else '')
         if instance is None:
             return HttpResponse('', content_type='text/plain; charset=utf-8')
 
-        def_content = self.generate_def_format(instance)
+        # Streamed in chunks so very large shows are never held in memory as a whole
+        return StreamingHttpResponse(self.stream_def_format(instance), content_type='text/plain; charset=utf-8')
+
+    def stream_def_format(self, led_content):
+        """Yield the encoded .def format text of a LEDContent instance in chunks"""
+        return show_def(led_content)
 
-        return HttpResponse(def_content, content_type='text/plain; charset=utf-8')
-    
     def generate_def_format(self, led_content):
         """Generate the .def format text from LEDContent instance"""
-        lines = []
-
-        # Add global Frame1 (daily start) if configured
-        if led_content.start_time:
-            lines.append(f'Frame1={led_content.start_time.strftime("%H:%M")}')
-
-        # Add global Frame0 (daily end) if configured
-        if led_content.end_time:
-            lines.append(f'Frame0={led_content.end_time.strftime("%H:%M")}')
-
-        sessions = led_content.sessions.all().order_by('session_order')
-        last_text = None  # Track last text for repetition logic
-
-        for i, session in enumerate(sessions):
-            # Add Start= line if date or time is specified
-            start_parts = []
-            if session.start_date:
-                start_parts.append(session.start_date.strftime('%Y-%m-%d'))
-            if session.start_time:
-                start_parts.append(session.start_time.strftime('%H:%M'))
-            if start_parts:
-                lines.append(f'Start={" ".join(start_parts)}')
-
-            # Add End= line if date or time is specified
-            end_parts = []
-            if session.end_date:
-                end_parts.append(session.end_date.strftime('%Y-%m-%d'))
-            if session.end_time:
-                end_parts.append(session.end_time.strftime('%H:%M'))
-            if end_parts:
-                lines.append(f'End={" ".join(end_parts)}')
-
-            # Check if session has text or animation
-            has_text = hasattr(session, 'text') and session.text
-            has_animation = hasattr(session, 'animation') and session.animation
-
-            # Add lines for this session (before text)
-            for line in session.lines.all().order_by('start_index'):
-                r, g, b = line.color_rgb
-                lines.append(f'Line={line.start_index},{r},{g},{b}')
-
-            # Add text configuration
-            if has_text:
-                text = session.text
-                lines.append(f'Text={text.start_index},{text.content}')
-                # Add color configuration
-                r, g, b = text.color_rgb
-                lines.append(f'Color={r},{g},{b}')
-                last_text = text  # Remember this text
-            elif has_animation and last_text is None:
-                # First animation without preceding text - add empty text
-                lines.append('Text=')
-            # If has_animation and last_text exists, previous text is repeated (no Text= line)
-
-            # Add animation configuration (after text)
-            if has_animation:
-                anim = session.animation
-                image_list = anim.get_image_list()
-                # Format: Animation=l,t,n,<Bildname1>,<Bildname2>,...
-                animation_parts = [
-                    str(anim.loop_count),
-                    str(anim.time_between_images),
-                    str(len(image_list))
-                ] + image_list
-                lines.append(f'Animation={",".join(animation_parts)}')
-
-            # Add delay
-            lines.append(f'Delay={session.delay}')
-
-            # Add 'Next' separator (except for the last session)
-            if i < len(sessions) - 1:
-                lines.append('Next')
-
-        return '\n'.join(lines)
+        return render_def(led_content)
 
 
 class LEDContentDefTestView(LEDContentDefView):
     """View for serving test LED content in .def format"""
+    poll_analytics = None
 
     def get_object(self):
         # Return the test LED content
         return LEDContent.objects.filter(is_test=True).first()
+
+
+class LEDContentCloneView(generics.GenericAPIView):
+    """Deep-copy a show, optionally shifting all session dates"""
+    queryset = LEDContent.objects.all()
+    serializer_class = LEDContentCloneSerializer
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            clone = clone_show(
+                self.get_object(),
+                created_by=request.user,
+                title=serializer.validated_data.get('title'),
+                date_offset=timedelta(days=serializer.validated_data['date_offset_days']),
+            )
+        except DjangoValidationError as e:
+            raise ValidationError({'date_offset_days': e.messages})
+        return Response({'id': clone.pk, 'title': clone.title}, status=status.HTTP_201_CREATED)
+
+
+class LEDContentFramesView(generics.GenericAPIView):
+    """
+    Simulated matrix frames of a show as a compressed frame stream (see content.simulator).
+
+    ``?profile=`` selects an output profile, by default the one matching the
+    show's Frame1/Frame0 window right now.
+    """
+    queryset = LEDContent.objects.all()
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        led_content = self.get_object()
+        profile = request.query_params.get('profile') or profile_for(led_content)
+        if profile not in settings.LED_OUTPUT_PROFILES:
+            raise ValidationError({'profile': f'Unknown output profile, choose from {", ".join(settings.LED_OUTPUT_PROFILES)}'})
+        response = HttpResponse(show_frames(led_content, profile), content_type='application/octet-stream')
+        response['ETag'] = f'"{led_content.version}-{profile}"'
+        return response
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BUNDLE_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) byte positions of a single range header, end inclusive.
+
+    None means the whole file is served: no header or several ranges.
+    Raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range, the last n bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def iter_file(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(BUNDLE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+class ImageBundleView(generics.GenericAPIView):
+    """
+    Serve an image bundle file, honoring single range requests.
+
+    Bundles never change, so the ETag is the bundle hash and devices can
+    resume or fetch single images with Range and If-Range.
+    """
+    def get(self, request, bundle_hash, *args, **kwargs):
+        path = bundle_path(bundle_hash)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            raise Http404('No such bundle')
+
+        etag = f'"{bundle_hash}"'
+        byte_range = None
+        header = request.headers.get('Range')
+        if header and request.headers.get('If-Range', etag) == etag:
+            try:
+                byte_range = parse_range(header, size)
+            except ValueError:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        start, end = byte_range or (0, size - 1)
+        response = StreamingHttpResponse(iter_file(path, start, end - start + 1), content_type='application/octet-stream')
+        if byte_range is not None:
+            response.status_code = status.HTTP_206_PARTIAL_CONTENT
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+
+class ImageBundleManifestView(generics.GenericAPIView):
+    """Manifest of the image bundle of the active show"""
+
+    def get_object(self):
+        return LEDContent.objects.filter(is_active=True).order_by('-created_at').first()
+
+    def get(self, request, *args, **kwargs):
+        instance = self.get_object()
+        if instance is None:
+            return Response({'bundle': '', 'size': 0, 'images': [], 'missing': [], 'url': ''})
+        manifest = get_bundle_manifest(instance)
+        url = request.build_absolute_uri(reverse('image-bundle', args=[manifest['bundle']]))
+        return Response({**manifest, 'url': url})
+
+
+class ImageBundleManifestTestView(ImageBundleManifestView):
+    """Manifest of the image bundle of the test show"""
+
+    def get_object(self):
+        return LEDContent.objects.filter(is_test=True).first()
+
+
+class VersionProbeView(View):
+    """
+    Version, checksum and next schedule boundary of the active show.
+
+    A plain Django view reading one cache entry, cheap enough for devices to
+    poll every second.
+    """
+    http_method_names = ['get', 'head', 'options']
+    kind = 'active'
+
+    def get(self, request, *args, **kwargs):
+        warmer.ensure_started()
+        return HttpResponse(get_probe(self.kind), content_type='application/json')
+
+
+class VersionProbeTestView(VersionProbeView):
+    """Version probe of the test show"""
+    kind = 'test'
+
+
+class DeviceTelemetryView(generics.GenericAPIView):
+    """Accept device heartbeats, they are written to the database in batches"""
+    serializer_class = DeviceReportSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        telemetry.buffer.add(
+            ip_address=client_ip(request) or None,
+            last_seen=timezone.now(),
+            **serializer.validated_data
+        )
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+
+class PollAnalyticsView(generics.GenericAPIView):
+    """Poll statistics of /api/content.txt collected by this process"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(content_polls.snapshot())
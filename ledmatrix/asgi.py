@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ledmatrix.settings')
+# Device endpoints use the async views with the async ORM under ASGI
+os.environ.setdefault('LED_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -109,6 +110,19 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Rendered fragments are cached per session, so a single large show needs
+# thousands of entries; LocMemCache culls at 300 entries by default.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    }
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -127,6 +141,61 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "static"
 
+# Uploaded files (image assets)
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
+
+
+# LED matrix geometry and content limits
+
+LED_MATRIX_WIDTH = 128
+LED_MATRIX_HEIGHT = 16
+LED_MATRIX_MAX_LINES = 13
+LED_MATRIX_MAX_TEXT_LENGTH = 250
+
+# Rendered shows are shared by all worker processes through memory-mapped
+# files in this directory, set to None to keep them in the per-process cache.
+# The directory must be owned by the server user and not writable by others.
+LED_SHARED_RENDER_DIR = BASE_DIR / 'render'
+
+# Serve the device endpoints with the async views (set by ledmatrix/asgi.py)
+LED_ASYNC_VIEWS = os.environ.get('LED_ASYNC_VIEWS') == '1'
+
+# Sessions read per chunk when streaming .def content
+LED_DEF_STREAM_CHUNK_SIZE = 500
+
+# Image libraries larger than this use an autocomplete instead of checkboxes
+LED_IMAGE_AUTOCOMPLETE_THRESHOLD = 200
+
+# Content addressed image bundles for the displays
+LED_IMAGE_BUNDLE_DIR = MEDIA_ROOT / 'bundles'
+
+# Device telemetry is buffered in memory and written in batches
+LED_TELEMETRY_FLUSH_INTERVAL = 10  # seconds
+LED_TELEMETRY_BUFFER_SIZE = 1000  # devices
+LED_TELEMETRY_OFFLINE_AFTER = 300  # seconds without heartbeat
+
+# Output profiles (gamma correction and brightness limit) applied when rendering
+# frames. The night profile is used outside the Frame1/Frame0 window of a show.
+LED_OUTPUT_PROFILES = {
+    'day': {'gamma': 1.0, 'brightness': 1.0},
+    'night': {'gamma': 2.2, 'brightness': 0.3},
+}
+LED_DAY_PROFILE = 'day'
+LED_NIGHT_PROFILE = 'night'
+
+# Caches of the active and test show are warmed ahead of their schedule boundaries
+LED_SCHEDULE_WARMER = True
+LED_SCHEDULE_WARM_LEAD = 30  # seconds before a boundary
+LED_SCHEDULE_POLL_INTERVAL = 300  # seconds between checks for edited shows
+LED_SCHEDULE_WARM_FRAMES = False  # also render the admin preview frame stream
+
+# Seconds a process serves /api/version from its cache. Edits drop the probe
+# of the editing process right away; with a per-process cache the other
+# processes pick them up after this long.
+LED_VERSION_PROBE_TTL = 5
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 